@@ -4,6 +4,24 @@ from __future__ import annotations
 import os
 from pathlib import Path
 
+from app.exceptions import ConfigurationError
+
+# Accepted values of the enumerated settings below
+FRAME_SAMPLING_MODES = ("auto", "grab", "seek")
+FACE_DETECTOR_BACKENDS = ("haar", "yunet")
+ANALYSIS_REGIONS = ("face", "frame")
+DETECTOR_BACKENDS = ("torch", "onnx")
+ANALYSIS_POOL_TYPES = ("thread", "process")
+
+
+def _choice(name: str, default: str, choices: tuple) -> str:
+    # Enumerated setting: an unknown value stops startup instead of silently falling back
+    value = os.environ.get(name, default).strip().lower()
+    if value not in choices:
+        raise ConfigurationError(f"Invalid {name} '{value}'. Expected one of: {', '.join(choices)}")
+    return value
+
+
 # Base paths
 BASE_DIR = Path(__file__).resolve().parent.parent
 UPLOAD_DIR = Path(os.environ.get("UPLOAD_DIR", BASE_DIR / "uploads"))
@@ -17,8 +35,75 @@ PORT = int(os.environ.get("PORT", "8000"))
 MAX_VIDEO_SIZE_MB = int(os.environ.get("MAX_VIDEO_SIZE_MB", "100"))
 FRAMES_PER_SECOND_SAMPLED = float(os.environ.get("FRAMES_PER_SECOND_SAMPLED", "1"))
 MAX_FRAMES = int(os.environ.get("MAX_FRAMES", "64"))
+# Frame sampling strategy: "auto", "grab" or "seek"
+FRAME_SAMPLING_MODE = _choice("FRAME_SAMPLING_MODE", "auto", FRAME_SAMPLING_MODES)
+# Downsample frames to this longer side before FFT analysis (0 = native resolution)
+FREQUENCY_ANALYSIS_SIZE = int(os.environ.get("FREQUENCY_ANALYSIS_SIZE", "0"))
+# Face detector backend: "haar" (built-in cascade) or "yunet" (OpenCV DNN, needs model file)
+FACE_DETECTOR_BACKEND = _choice("FACE_DETECTOR_BACKEND", "haar", FACE_DETECTOR_BACKENDS)
+FACE_DETECTOR_MODEL_PATH = os.environ.get("FACE_DETECTOR_MODEL_PATH", "")
+# Region analysed by heuristics and the model: "frame" (whole frame) or "face" (padded face
+# crops). Heuristic thresholds are calibrated on whole frames; "face" shifts the scores
+ANALYSIS_REGION = _choice("ANALYSIS_REGION", "frame", ANALYSIS_REGIONS)
 # Optional path to PyTorch model weights (.pth). If set, model inference is used.
 MODEL_WEIGHTS_PATH = os.environ.get("MODEL_WEIGHTS_PATH", "")
+# Detector inference backend: "torch" (loads MODEL_WEIGHTS_PATH) or "onnx" (onnxruntime,
+# loads MODEL_ONNX_PATH, default: the weights path with an .onnx suffix)
+DETECTOR_BACKEND = _choice("DETECTOR_BACKEND", "torch", DETECTOR_BACKENDS)
+MODEL_ONNX_PATH = os.environ.get("MODEL_ONNX_PATH", "")
+# Serve an optimised TorchScript detector (BN folded into convs, channels_last, frozen),
+# persisted next to the weights as <stem>.<hash>.ts and reused on later startups
+MODEL_OPTIMIZE = os.environ.get("MODEL_OPTIMIZE", "false").strip().lower() in ("1", "true", "yes")
+# Optional video whose frames calibrate / check the INT8 model (synthetic frames if empty)
+MODEL_QUANTIZATION_REFERENCE_VIDEO = os.environ.get("MODEL_QUANTIZATION_REFERENCE_VIDEO", "")
+
+# Multi-process serving (gunicorn.conf.py): WEB_WORKERS processes forked from a master that
+# preloads the models; INTRA_OP_THREADS caps BLAS/OpenMP/torch/OpenCV threads per process
+# (0 = CPUs divided evenly across WEB_WORKERS)
+WEB_WORKERS = int(os.environ.get("WEB_WORKERS", "1"))
+INTRA_OP_THREADS = int(os.environ.get("INTRA_OP_THREADS", "0"))
+
+# Analysis worker pool: CPU-heavy analysis runs here instead of on the event loop
+# ANALYSIS_POOL_TYPE is "thread" or "process"
+ANALYSIS_WORKERS = int(os.environ.get("ANALYSIS_WORKERS", "2"))
+ANALYSIS_POOL_TYPE = _choice("ANALYSIS_POOL_TYPE", "thread", ANALYSIS_POOL_TYPES)
+
+# Cross-request inference batching: frames from concurrent analyses share forward passes
+# A batch runs once INFERENCE_BATCH_MAX_FRAMES frames are queued or the oldest has waited
+# INFERENCE_BATCH_MAX_WAIT_MS (0 = only coalesce what is already queued)
+INFERENCE_BATCH_MAX_FRAMES = int(os.environ.get("INFERENCE_BATCH_MAX_FRAMES", "32"))
+INFERENCE_BATCH_MAX_WAIT_MS = float(os.environ.get("INFERENCE_BATCH_MAX_WAIT_MS", "5"))
+
+# Load models and run a synthetic analysis at startup; /api/ready reports 503 until done
+WARMUP_ON_STARTUP = os.environ.get("WARMUP_ON_STARTUP", "true").strip().lower() in ("1", "true", "yes")
+
+# Batch analysis (POST /api/analyze/batch): at most BATCH_MAX_VIDEOS per request and
+# BATCH_MAX_TOTAL_MB of uploads; manifest paths must resolve inside BATCH_ALLOWED_DIR
+# (empty = manifests disabled, uploads only)
+BATCH_MAX_VIDEOS = int(os.environ.get("BATCH_MAX_VIDEOS", "50"))
+BATCH_MAX_TOTAL_MB = int(os.environ.get("BATCH_MAX_TOTAL_MB", "1024"))
+BATCH_ALLOWED_DIR = os.environ.get("BATCH_ALLOWED_DIR", "")
+
+# Asynchronous jobs (POST /api/jobs): queue persisted in SQLite so jobs survive restarts
+# JOB_WORKERS bounds concurrently running jobs per server process. Running jobs whose server
+# process (or analysis worker process) died on this machine are requeued at once (failed after
+# JOB_MAX_ATTEMPTS attempts);
+# jobs claimed on another machine only after JOB_STALE_SECONDS without progress.
+# Finished jobs are kept for JOB_RETENTION_HOURS
+JOBS_DB_PATH = Path(os.environ.get("JOBS_DB_PATH", UPLOAD_DIR / "jobs.sqlite3"))
+JOBS_DIR = Path(os.environ.get("JOBS_DIR", UPLOAD_DIR / "jobs"))
+JOBS_DIR.mkdir(parents=True, exist_ok=True)
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", str(ANALYSIS_WORKERS)))
+JOB_STALE_SECONDS = float(os.environ.get("JOB_STALE_SECONDS", "600"))
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", "2"))
+JOB_RETENTION_HOURS = float(os.environ.get("JOB_RETENTION_HOURS", "24"))
+
+# Result cache for repeat uploads (keyed by upload SHA-256 + analysis config fingerprint)
+# RESULT_CACHE_SIZE is the in-memory LRU entry count (0 disables caching)
+# RESULT_CACHE_DIR enables the optional on-disk tier, bounded by RESULT_CACHE_MAX_MB
+RESULT_CACHE_SIZE = int(os.environ.get("RESULT_CACHE_SIZE", "256"))
+RESULT_CACHE_DIR = os.environ.get("RESULT_CACHE_DIR", "")
+RESULT_CACHE_MAX_MB = int(os.environ.get("RESULT_CACHE_MAX_MB", "64"))
 
 # CORS - allow frontend origin
 CORS_ORIGINS = os.environ.get("CORS_ORIGINS", "*").split(",")
@@ -74,6 +74,14 @@ ENTROPY_STD_DIVISOR: float = 1.0
 HISTOGRAM_BINS_H: int = 32  # Hue channel bins
 HISTOGRAM_BINS_S: int = 32  # Saturation channel bins
 
+# Frames stacked per batched FFT call in the frequency feature
+FREQUENCY_BATCH_SIZE: int = 8
+
+# Frequency analysis downsampling: frames whose longer side exceeds this are resized
+# before the FFT (0 = analyse at native resolution)
+# Set via environment variable FREQUENCY_ANALYSIS_SIZE, defaults to this
+DEFAULT_FREQUENCY_ANALYSIS_SIZE: int = 0
+
 # Minimum entropy threshold (too uniform color = suspicious)
 MIN_COLOR_ENTROPY: float = 0.1
 
@@ -114,6 +122,45 @@ COLOR_SPACE: str = "BGR"
 # Face detection input size (for face landmark irregularity detection in future)
 FACE_DETECTION_INPUT_SIZE: int = 224
 
+# Faces are detected on a copy downscaled so its longer side is at most this
+# (boxes are rescaled back to the original frame). Haar cannot match faces smaller
+# than its 24px window in the downscaled copy, so on large frames its minimum face is
+# 24 * longer_side / FACE_DETECTION_MAX_SIDE pixels, e.g. 72px on 1920x1080, above
+# FACE_MIN_SIZE. Raise this (0 = native resolution) for footage with small faces
+FACE_DETECTION_MAX_SIDE: int = 640
+
+# Minimum face size in original-frame pixels (see FACE_DETECTION_MAX_SIDE for Haar)
+FACE_MIN_SIZE: int = 30
+
+# Face region-of-interest analysis: heuristics and the model run on a square crop
+# around the largest face, padded by this fraction of the face size on each side
+FACE_ROI_PADDING: float = 0.25
+
+# Side length of the face region fed to heuristics and the model
+# (matches the model input so the crop is used as-is)
+FACE_ROI_SIZE: int = 256
+
+# Face tracking: the detector runs on every Nth sampled frame (keyframe); boxes are
+# propagated between keyframes by template matching
+FACE_TRACK_KEYFRAME_INTERVAL: int = 5
+
+# Minimum IoU for a keyframe detection to continue an existing track
+FACE_TRACK_IOU_THRESHOLD: float = 0.3
+
+# Minimum normalised cross-correlation for a template match to keep a track alive
+FACE_TRACK_MIN_SCORE: float = 0.6
+
+# Template search window margin around the previous box (fraction of box size)
+FACE_TRACK_SEARCH_MARGIN: float = 3.0
+
+# Minimum confidence for DNN (YuNet) face detections
+FACE_DNN_SCORE_THRESHOLD: float = 0.8
+
+# The human check detects faces on at most this many sample frames, spread evenly over
+# the clip, before anything is analysed; a clip with no face in any of them is reported
+# as no_human. Raising it finds briefly visible faces at the cost of a slower no_human path
+FACE_PROBE_FRAMES: int = 16
+
 # ============================================================================
 # DEEP LEARNING MODEL CONFIGURATION
 # ============================================================================
@@ -128,6 +175,19 @@ USE_GPU_IF_AVAILABLE: bool = True
 # Model quantization (reduces memory and speeds up inference)
 USE_MODEL_QUANTIZATION: bool = False
 
+# Quantization scheme: "static" (INT8 Conv+BN+ReLU blocks, calibrated on reference
+# frames) or "dynamic" (INT8 Linear layers only, no calibration)
+MODEL_QUANTIZATION_MODE: str = "static"
+
+# Reference frames used for static calibration
+QUANTIZATION_REFERENCE_FRAMES: int = 32
+
+# Held-out frames (not seen during calibration) used for the fp32 vs INT8 accuracy check
+QUANTIZATION_EVALUATION_FRAMES: int = 16
+
+# The INT8 model is rejected (fp32 kept) if any evaluation frame probability moves more than this
+QUANTIZATION_MAX_DELTA: float = 0.02
+
 # Batch size for processing frames (impacts memory usage and speed)
 INFERENCE_BATCH_SIZE: int = 8
 
@@ -173,12 +233,31 @@ DEFAULT_MAX_FRAMES: int = 64
 # Set via environment variable FRAMES_PER_SECOND_SAMPLED, defaults to this
 DEFAULT_FRAMES_PER_SECOND: float = 1.0
 
+# Frame sampling strategy: "auto" picks per video, "grab" decodes sequentially and only
+# converts kept frames, "seek" jumps to each kept frame via CAP_PROP_POS_FRAMES
+# Set via environment variable FRAME_SAMPLING_MODE, defaults to this
+DEFAULT_FRAME_SAMPLING_MODE: str = "auto"
+
+# In "auto" mode, seek only when kept frames are at least this many frames apart.
+# A seek re-decodes from the preceding keyframe, so it only wins over grab() when the
+# gap exceeds a typical GOP length (x264 default keyint is 250)
+SEEK_MIN_FRAME_GAP: int = 300
+
+# Intra-only codecs (every frame is a keyframe), where seeking is always cheap
+INTRA_ONLY_FOURCCS: tuple[str, ...] = ("MJPG", "mjpg", "MJPA", "jpeg", "apcn", "apch", "apcs", "ap4h")
+
 # Request timeout in seconds (prevents hanging on corrupted videos)
 VIDEO_PROCESSING_TIMEOUT_SECONDS: int = 60
 
 # Maximum video file size in MB (prevents memory exhaustion)
 DEFAULT_MAX_VIDEO_SIZE_MB: int = 100
 
+# Chunk size used when streaming uploads to disk (bounds per-upload memory)
+UPLOAD_CHUNK_SIZE_BYTES: int = 1024 * 1024
+
+# Allowance for multipart boundaries/headers on top of the video size limit
+UPLOAD_MULTIPART_OVERHEAD_BYTES: int = 64 * 1024
+
 # ============================================================================
 # ERROR HANDLING & LOGGING
 # ============================================================================
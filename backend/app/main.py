@@ -2,12 +2,21 @@
 from __future__ import annotations
 
 import logging
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
-from app.config import CORS_ORIGINS, HOST, PORT
-from app.routes import analyze_router
+from app.config import BATCH_MAX_TOTAL_MB, CORS_ORIGINS, HOST, PORT, MAX_VIDEO_SIZE_MB, WARMUP_ON_STARTUP
+from app.routes import analyze_router, jobs_router
+from app.services.batching import inference_batcher
+from app.services.executor import analysis_executor
+from app.services.jobs import job_runner
+from app.services.result_cache import result_cache
+from app.services.warmup import warmup_state
+from app.utils.face_detection import face_detector_stats
+from app.utils.upload_utils import UploadSizeLimitMiddleware
 
 logging.basicConfig(
     level=logging.INFO,
@@ -15,10 +24,34 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+# Application lifespan: warm models and start the job runner, release worker pools on shutdown
+async def lifespan(app: FastAPI):
+    if WARMUP_ON_STARTUP:
+        warmup_state.start(analysis_executor)
+    else:
+        warmup_state.mark_ready()
+    job_runner.start(analysis_executor)
+    yield
+    job_runner.stop()
+    analysis_executor.shutdown(wait=False)
+    inference_batcher.shutdown(wait=False)
+
+
 app = FastAPI(
     title="DeepGuard AI API",
     description="Video upload and deepfake detection",
     version="1.0.0",
+    lifespan=lifespan,
+)
+
+# Reject oversized uploads from Content-Length, or as soon as a chunked body crosses the limit
+# Added before CORSMiddleware so CORS wraps it and its 413 responses stay readable by browsers
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    max_bytes=MAX_VIDEO_SIZE_MB * 1024 * 1024,
+    path_limits={"/api/analyze/batch": BATCH_MAX_TOTAL_MB * 1024 * 1024},
 )
 
 app.add_middleware(
@@ -29,7 +62,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
 app.include_router(analyze_router)
+app.include_router(jobs_router)
 
 
 @app.get("/api/health")
@@ -38,6 +73,32 @@ def health():
     return {"status": "ok", "service": "deepguard-backend"}
 
 
+@app.get("/api/ready")
+# Readiness probe: 200 once startup warmup has finished, 503 before
+def ready():
+    snapshot = warmup_state.snapshot()
+    return JSONResponse(snapshot, status_code=200 if snapshot["ready"] else 503)
+
+
+@app.get("/api/stats")
+# Runtime counters for process-wide caches and worker pools
+def stats():
+    data = {
+        "executor": analysis_executor.stats(),
+        "inferenceBatcher": inference_batcher.stats(),
+        "resultCache": result_cache.stats(),
+        "jobs": job_runner.stats(),
+        "faceDetectors": face_detector_stats(),
+    }
+    try:
+        from app.models.registry import model_registry
+        data["modelRegistry"] = model_registry.stats()
+    except ImportError:
+        # PyTorch not installed - no model registry in this process
+        data["modelRegistry"] = None
+    return data
+
+
 @app.get("/")
 # Root info
 def root():
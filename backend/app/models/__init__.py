@@ -1,4 +1,8 @@
 """Optional ML models for deepfake detection."""
-from .detector import load_detector, preprocess_frames
+from .detector import load_detector, predict_probabilities, preprocess_frames
+from .backends import DetectorBackend, OnnxDetectorBackend, TorchDetectorBackend, load_backend
+from .registry import ModelRegistry, get_detector, model_registry
 
-__all__ = ["load_detector", "preprocess_frames"]
+__all__ = ["load_detector", "predict_probabilities", "preprocess_frames",
+    "DetectorBackend", "OnnxDetectorBackend", "TorchDetectorBackend", "load_backend",
+    "ModelRegistry", "get_detector", "model_registry"]
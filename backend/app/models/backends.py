@@ -0,0 +1,104 @@
+# Detector inference backends: PyTorch (eager / quantized) and ONNX Runtime
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+from typing import Any, Optional
+
+import numpy as np
+
+from app.config import DETECTOR_BACKEND, DETECTOR_BACKENDS, MODEL_ONNX_PATH, MODEL_WEIGHTS_PATH
+from app.exceptions import ConfigurationError
+
+logger = logging.getLogger(__name__)
+
+
+def _probabilities_from_logits(logits: np.ndarray) -> np.ndarray:
+    # Same reduction as predict_probabilities, in numpy
+    if logits.shape[-1] == 1:
+        # Single output node - use sigmoid
+        return (1.0 / (1.0 + np.exp(-logits[:, 0]))).astype(np.float32)
+    # Multi-class - use softmax and take positive class
+    shifted = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return (shifted[:, 1] / shifted.sum(axis=1)).astype(np.float32)
+
+
+class DetectorBackend:
+    # Interface for detector inference
+    # predict() takes a normalized float32 blob [N, 3, H, W] (see frames_to_blob) and
+    # returns per-frame positive-class probabilities [N]
+
+    name: str = "base"
+
+    def predict(self, blob: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+
+class TorchDetectorBackend(DetectorBackend):
+    # Wraps an eval-mode PyTorch module (fp32 or INT8 from load_detector)
+
+    name = "torch"
+
+    def __init__(self, model: Any):
+        self.model = model
+
+    def predict(self, blob: np.ndarray) -> np.ndarray:
+        import torch
+
+        from app.models.detector import predict_probabilities
+
+        return predict_probabilities(self.model, torch.from_numpy(blob))
+
+
+class OnnxDetectorBackend(DetectorBackend):
+    # ONNX Runtime CPU session over an exported detector (no torch import needed)
+
+    name = "onnx"
+
+    def __init__(self, onnx_path: str | Path):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(str(onnx_path), options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def predict(self, blob: np.ndarray) -> np.ndarray:
+        (logits,) = self.session.run(None, {self.input_name: np.ascontiguousarray(blob, dtype=np.float32)})
+        return _probabilities_from_logits(logits)
+
+
+def detector_model_path(backend: str = DETECTOR_BACKEND) -> str:
+    # Model artifact for the configured backend: the .pth for torch, the .onnx for onnx
+    # (MODEL_ONNX_PATH, or the weights path with an .onnx suffix)
+    if backend not in DETECTOR_BACKENDS:
+        raise ConfigurationError(
+            f"Invalid DETECTOR_BACKEND '{backend}'. Expected one of: {', '.join(DETECTOR_BACKENDS)}"
+        )
+    weights_path = (MODEL_WEIGHTS_PATH or "").strip()
+    if backend == "torch":
+        return weights_path
+    onnx_path = (MODEL_ONNX_PATH or "").strip()
+    if onnx_path:
+        return onnx_path
+    return str(Path(weights_path).with_suffix(".onnx")) if weights_path else ""
+
+
+def load_backend(model_path: str | Path) -> Optional[DetectorBackend]:
+    # Load a backend for a model artifact, chosen by file type; None if loading fails
+    path = Path(model_path)
+    if not path.exists():
+        return None
+    if path.suffix == ".onnx":
+        try:
+            return OnnxDetectorBackend(path)
+        except ImportError:
+            logger.warning("onnxruntime not installed; cannot load %s", path)
+        except Exception as e:
+            logger.warning("Could not load ONNX detector from %s: %s", path, e)
+        return None
+
+    from app.models.detector import load_detector
+
+    model = load_detector(path)
+    return TorchDetectorBackend(model) if model is not None else None
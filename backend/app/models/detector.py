@@ -3,10 +3,16 @@ from __future__ import annotations
 
 import logging
 from pathlib import Path
-from typing import List, Optional
-import torch
+from typing import TYPE_CHECKING, List, Optional
 import numpy as np
 
+from app.config import MODEL_OPTIMIZE
+from app.constants import USE_MODEL_QUANTIZATION
+
+if TYPE_CHECKING:
+    # torch stays an optional, lazily imported dependency
+    import torch
+
 logger = logging.getLogger(__name__)
 
 # Input size expected by the model
@@ -16,7 +22,6 @@ DEVICE = "cpu"
 
 def _mesonet(num_classes: int = 1) -> "torch.nn.Module":
     # MesoNet-style small CNN for 256x256 RGB input
-    import torch
     import torch.nn as nn
 
     class MesoNet(nn.Module):
@@ -57,8 +62,14 @@ def _mesonet(num_classes: int = 1) -> "torch.nn.Module":
     return MesoNet()
 
 
-def load_detector(weights_path: str | Path) -> Optional["torch.nn.Module"]:
+def load_detector(
+    weights_path: str | Path,
+    quantize: bool = USE_MODEL_QUANTIZATION,
+    optimize: bool = MODEL_OPTIMIZE,
+) -> Optional["torch.nn.Module"]:
     # Load detector from .pth file, return None if loading fails
+    # With quantize, returns the INT8 variant when it passes the fp32 accuracy check;
+    # otherwise with optimize, the cached Conv-BN folded TorchScript artifact
     try:
         import torch
     except ImportError:
@@ -77,28 +88,51 @@ def load_detector(weights_path: str | Path) -> Optional["torch.nn.Module"]:
         model.load_state_dict(state, strict=False)
         model.to(DEVICE)
         model.eval()
-        return model
     except Exception as e:
         logger.warning("Could not load detector from %s: %s", path, e)
         return None
+    if quantize:
+        from app.models.quantization import quantize_for_inference
+
+        return quantize_for_inference(model, str(path))
+    if optimize:
+        from app.models.optimize import load_optimized_detector
+
+        return load_optimized_detector(model, path)
+    return model
 
 
 def preprocess_frames(frames: List[np.ndarray]) -> Optional["torch.Tensor"]:
     # Convert BGR frames list to normalized tensor [N,3,H,W]
+    # The tensor shares memory with the contiguous float32 blob (no extra copy)
     try:
         import torch
-        import cv2
     except ImportError:
         return None
-    out = []
-    for f in frames:
-        rgb = cv2.cvtColor(f, cv2.COLOR_BGR2RGB)
-        resized = cv2.resize(rgb, (INPUT_SIZE, INPUT_SIZE))
-        # [0, 255] -> [0, 1]
-        x = resized.astype(np.float32) / 255.0
-        x = (x - np.array([0.485, 0.456, 0.406])) / np.array([0.229, 0.224, 0.225])
-        out.append(x)
-    if not out:
+    if not frames:
         return None
-    tensor = torch.from_numpy(np.stack(out)).float().permute(0, 3, 1, 2)
-    return tensor
+    from app.utils.preprocessing import frames_to_blob
+
+    return torch.from_numpy(frames_to_blob(frames, INPUT_SIZE, INPUT_SIZE))
+
+
+def predict_probabilities(model: "torch.nn.Module", tensor: "torch.Tensor") -> np.ndarray:
+    # Forward one batch, return per-frame positive-class probabilities [N]
+    import torch
+
+    # Move tensor to same device as model (quantized modules have no float parameters)
+    param = next(model.parameters(), None)
+    tensor = tensor.to(param.device if param is not None else DEVICE)
+
+    # Run inference with no gradient computation (evaluation mode)
+    with torch.no_grad():
+        logits = model(tensor)
+
+        # Handle different output formats
+        if logits.shape[-1] == 1:
+            # Single output node - use sigmoid
+            probs = torch.sigmoid(logits).squeeze(-1)
+        else:
+            # Multi-class - use softmax and take positive class
+            probs = torch.softmax(logits, dim=1)[:, 1]
+    return probs.cpu().numpy().reshape(-1)
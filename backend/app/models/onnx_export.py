@@ -0,0 +1,60 @@
+# Export detector weights to ONNX for the onnxruntime backend
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+
+import numpy as np
+
+from app.models.detector import INPUT_SIZE, load_detector
+
+logger = logging.getLogger(__name__)
+
+# ONNX opset used for export (supported by onnxruntime >= 1.14)
+ONNX_OPSET = 17
+
+
+def export_onnx(weights_path: str | Path, onnx_path: str | Path | None = None, verify: bool = True) -> Path:
+    # Export the fp32 detector to ONNX with a dynamic batch dimension, returns the output path
+    # With verify, compares onnxruntime against PyTorch on a random batch
+    import torch
+
+    model = load_detector(weights_path, quantize=False, optimize=False)
+    if model is None:
+        raise FileNotFoundError(f"Could not load detector weights from {weights_path}")
+    out = Path(onnx_path) if onnx_path else Path(weights_path).with_suffix(".onnx")
+
+    example = torch.zeros(1, 3, INPUT_SIZE, INPUT_SIZE)
+    export_args = dict(
+        input_names=["input"],
+        output_names=["logits"],
+        dynamic_axes={"input": {0: "batch"}, "logits": {0: "batch"}},
+        opset_version=ONNX_OPSET,
+    )
+    try:
+        # Newer PyTorch defaults to the dynamo exporter; keep the TorchScript exporter
+        torch.onnx.export(model, (example,), str(out), dynamo=False, **export_args)
+    except TypeError:
+        torch.onnx.export(model, (example,), str(out), **export_args)
+    logger.info("Exported %s to %s", weights_path, out)
+
+    if verify:
+        from app.models.backends import OnnxDetectorBackend
+        from app.models.detector import predict_probabilities
+
+        blob = np.random.default_rng(0).standard_normal((4, 3, INPUT_SIZE, INPUT_SIZE)).astype(np.float32)
+        expected = predict_probabilities(model, torch.from_numpy(blob))
+        actual = OnnxDetectorBackend(out).predict(blob)
+        delta = float(np.abs(expected - actual).max())
+        if delta > 1e-4:
+            raise RuntimeError(f"ONNX export of {weights_path} differs from PyTorch by {delta:.2e}")
+        logger.info("ONNX output matches PyTorch (max delta %.2e)", delta)
+    return out
+
+
+if __name__ == "__main__":
+    # python -m app.models.onnx_export weights.pth [out.onnx]
+    import sys
+
+    logging.basicConfig(level=logging.INFO)
+    print(export_onnx(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None))
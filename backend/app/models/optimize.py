@@ -0,0 +1,154 @@
+# Optimised TorchScript detector: Conv-BN folding, channels_last, traced + frozen, cached on disk
+from __future__ import annotations
+
+import copy
+import hashlib
+import logging
+import os
+import warnings
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+import torch
+import torch.nn as nn
+from torch.nn.utils.fusion import fuse_conv_bn_eval
+
+from app.models.detector import DEVICE, INPUT_SIZE
+from app.utils.hashing import sha256_file
+
+logger = logging.getLogger(__name__)
+
+# Bump when optimize_detector changes so old artifacts are rebuilt
+OPTIMIZED_ARTIFACT_VERSION = 1
+
+# Max allowed |logit| difference between the artifact and the eager model
+OPTIMIZED_MAX_DELTA = 1e-4
+
+
+@contextmanager
+def _quiet_torchscript():
+    # Newer PyTorch releases flag every TorchScript call as deprecated
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", FutureWarning)
+        warnings.simplefilter("ignore", DeprecationWarning)
+        yield
+
+
+class _ChannelsLast(nn.Module):
+    # Converts NCHW input to channels_last so the traced convs run on NHWC kernels
+
+    def __init__(self, model: nn.Module):
+        super().__init__()
+        self.model = model
+
+    def forward(self, x):
+        return self.model(x.contiguous(memory_format=torch.channels_last))
+
+
+def fold_conv_bn(module: nn.Module) -> nn.Module:
+    # Fold every BatchNorm2d that directly follows a Conv2d in a Sequential into the conv
+    # (eval mode only; the BN's running statistics become part of the conv weights)
+    for name, child in module.named_children():
+        if isinstance(child, nn.Sequential):
+            layers = list(child)
+            folded = []
+            i = 0
+            while i < len(layers):
+                layer = layers[i]
+                if isinstance(layer, nn.Conv2d) and i + 1 < len(layers) and isinstance(layers[i + 1], nn.BatchNorm2d):
+                    folded.append(fuse_conv_bn_eval(layer, layers[i + 1]))
+                    i += 2
+                    continue
+                folded.append(fold_conv_bn(layer))
+                i += 1
+            setattr(module, name, nn.Sequential(*folded))
+        else:
+            fold_conv_bn(child)
+    return module
+
+
+def optimize_detector(model: nn.Module) -> "torch.jit.ScriptModule":
+    # Frozen TorchScript copy of an eval-mode detector (the eager model is left untouched)
+    optimized = fold_conv_bn(copy.deepcopy(model).eval())
+    optimized = _ChannelsLast(optimized.to(memory_format=torch.channels_last)).eval()
+    example = torch.zeros(2, 3, INPUT_SIZE, INPUT_SIZE)
+    with torch.no_grad(), _quiet_torchscript():
+        return torch.jit.freeze(torch.jit.trace(optimized, example))
+
+
+def artifact_path(weights_path: str | Path) -> Path:
+    # <weights dir>/<stem>.<key>.ts, key covers the weights hash, torch version and
+    # optimisation recipe so any of them changing produces a new artifact
+    path = Path(weights_path)
+    key_source = f"{sha256_file(path)}:{torch.__version__}:{OPTIMIZED_ARTIFACT_VERSION}"
+    key = hashlib.sha256(key_source.encode()).hexdigest()[:16]
+    return path.with_name(f"{path.stem}.{key}.ts")
+
+
+def _matches(reference: nn.Module, candidate: nn.Module) -> bool:
+    x = torch.randn(4, 3, INPUT_SIZE, INPUT_SIZE, generator=torch.Generator().manual_seed(0))
+    with torch.no_grad():
+        delta = (reference(x) - candidate(x)).abs().max().item()
+    if delta > OPTIMIZED_MAX_DELTA:
+        logger.warning("Optimized detector differs from eager model by %.2e", delta)
+        return False
+    return True
+
+
+def _load_artifact(path: Path) -> Optional["torch.jit.ScriptModule"]:
+    try:
+        with _quiet_torchscript():
+            return torch.jit.load(str(path), map_location=DEVICE)
+    except Exception as e:
+        logger.warning("Discarding unreadable optimized detector %s: %s", path.name, e)
+        path.unlink(missing_ok=True)
+        return None
+
+
+def _save_artifact(module: "torch.jit.ScriptModule", path: Path) -> None:
+    # Write under a unique temp name, then rename, so concurrent workers never read a partial file
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        with _quiet_torchscript():
+            torch.jit.save(module, str(tmp))
+        tmp.replace(path)
+    except OSError as e:
+        tmp.unlink(missing_ok=True)
+        logger.warning("Could not persist optimized detector to %s: %s", path, e)
+
+
+def load_optimized_detector(model: nn.Module, weights_path: str | Path) -> nn.Module:
+    # Loader hook: cached artifact for these weights, else build, verify and persist it.
+    # Falls back to the eager model if optimisation fails or changes the outputs
+    try:
+        path = artifact_path(weights_path)
+        if path.exists():
+            cached = _load_artifact(path)
+            if cached is not None:
+                logger.info("Loaded optimized detector %s", path.name)
+                return cached
+        optimized = optimize_detector(model)
+        if not _matches(model, optimized):
+            return model
+        _save_artifact(optimized, path)
+        logger.info("Built optimized detector %s", path.name)
+        return optimized
+    except Exception as e:
+        logger.warning("Could not optimize detector %s, using eager model: %s", weights_path, e)
+        return model
+
+
+if __name__ == "__main__":
+    # Build (or refresh) the optimized artifact next to a weights file:
+    # python -m app.models.optimize weights.pth
+    import sys
+
+    from app.models.detector import load_detector
+
+    eager = load_detector(sys.argv[1], quantize=False, optimize=False)
+    if eager is None:
+        sys.exit(f"Could not load detector from {sys.argv[1]}")
+    artifact_path(sys.argv[1]).unlink(missing_ok=True)
+    load_optimized_detector(eager, sys.argv[1])
+    print(artifact_path(sys.argv[1]))
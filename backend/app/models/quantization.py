@@ -0,0 +1,199 @@
+# INT8 quantisation of the detector for CPU inference, with an fp32 accuracy check
+from __future__ import annotations
+
+import copy
+import logging
+import threading
+import time
+import warnings
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+import torch
+
+from app.config import MODEL_QUANTIZATION_REFERENCE_VIDEO
+from app.constants import (
+    CLASSIFICATION_THRESHOLD,
+    MODEL_QUANTIZATION_MODE,
+    QUANTIZATION_EVALUATION_FRAMES,
+    QUANTIZATION_MAX_DELTA,
+    QUANTIZATION_REFERENCE_FRAMES,
+)
+from app.models.detector import INPUT_SIZE, predict_probabilities, preprocess_frames
+
+logger = logging.getLogger(__name__)
+
+QUANTIZATION_MODES = ("static", "dynamic")
+
+# Last accuracy report per weights file, exposed through the model registry stats
+_reports: Dict[str, Dict[str, Any]] = {}
+_reports_lock = threading.Lock()
+
+
+def quantization_reports() -> Dict[str, Dict[str, Any]]:
+    with _reports_lock:
+        return {path: dict(report) for path, report in _reports.items()}
+
+
+def synthetic_reference_frames(count: int = QUANTIZATION_REFERENCE_FRAMES, seed: int = 0) -> List[np.ndarray]:
+    # Deterministic BGR frames with natural-image-like structure (smooth gradients plus
+    # multi-scale blurred noise); used when no reference video is configured
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:INPUT_SIZE, 0:INPUT_SIZE].astype(np.float32) / INPUT_SIZE
+    frames = []
+    for _ in range(count):
+        base = rng.uniform(40, 200, size=3).astype(np.float32)
+        tilt = rng.uniform(-60, 60, size=(2, 3)).astype(np.float32)
+        frame = base + xx[..., None] * tilt[0] + yy[..., None] * tilt[1]
+        for sigma, amplitude in ((16, 40.0), (4, 20.0), (1, 8.0)):
+            noise = rng.standard_normal((INPUT_SIZE, INPUT_SIZE, 3)).astype(np.float32)
+            frame += amplitude * cv2.GaussianBlur(noise, (0, 0), sigma) * sigma
+        frames.append(np.clip(frame, 0, 255).astype(np.uint8))
+    return frames
+
+
+def reference_frames(
+    calibration_count: int = QUANTIZATION_REFERENCE_FRAMES,
+    evaluation_count: int = QUANTIZATION_EVALUATION_FRAMES,
+) -> Tuple[List[np.ndarray], List[np.ndarray]]:
+    # (calibration, evaluation) frames: sampled from MODEL_QUANTIZATION_REFERENCE_VIDEO when set
+    # (preferred, real content), otherwise the synthetic set. The evaluation frames are held out
+    # (later in the clip, or a different seed) so the accuracy check does not score the INT8
+    # model on the frames its activation ranges were fitted to
+    video = (MODEL_QUANTIZATION_REFERENCE_VIDEO or "").strip()
+    if video:
+        from app.utils.video_utils import extract_frames
+
+        try:
+            frames, _, _ = extract_frames(video, max_frames=calibration_count + evaluation_count)
+            if len(frames) < 2:
+                raise ValueError(f"only {len(frames)} frame(s) decoded")
+            # Short clips keep the calibration:evaluation ratio
+            split = max(1, len(frames) * calibration_count // (calibration_count + evaluation_count))
+            return frames[:split], frames[split:]
+        except Exception as e:
+            logger.warning(f"Could not read quantization reference video {video}: {e}")
+    return synthetic_reference_frames(calibration_count, seed=0), synthetic_reference_frames(evaluation_count, seed=1)
+
+
+def _quantization_engine() -> str:
+    supported = torch.backends.quantized.supported_engines
+    for engine in ("x86", "fbgemm", "qnnpack"):
+        if engine in supported:
+            return engine
+    raise RuntimeError("No quantized CPU engine available in this PyTorch build")
+
+
+def quantize_detector(
+    model: "torch.nn.Module",
+    mode: str = MODEL_QUANTIZATION_MODE,
+    calibration: Optional["torch.Tensor"] = None,
+) -> "torch.nn.Module":
+    # Return an INT8 copy of an eval-mode detector (the fp32 model is left untouched)
+    # "static": FX graph mode, Conv+BN+ReLU fused and quantised with activation ranges
+    #           observed on the calibration batch (most of MesoNet's compute)
+    # "dynamic": Linear layers only, weights INT8 and activations quantised on the fly
+    if mode not in QUANTIZATION_MODES:
+        raise ValueError(f"Unknown quantization mode '{mode}'. Expected one of: {', '.join(QUANTIZATION_MODES)}")
+    if mode == "static" and (calibration is None or len(calibration) == 0):
+        raise ValueError("Static quantization needs a calibration batch")
+    model = copy.deepcopy(model).eval()
+    engine = _quantization_engine()
+    torch.backends.quantized.engine = engine
+
+    # Newer PyTorch releases flag torch.ao.quantization as deprecated on every call
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        if mode == "dynamic":
+            return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+        from torch.ao.quantization import get_default_qconfig_mapping
+        from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+
+        prepared = prepare_fx(model, get_default_qconfig_mapping(engine), (calibration[:1],))
+        with torch.no_grad():
+            prepared(calibration)
+        return convert_fx(prepared)
+
+
+def accuracy_delta(
+    reference: "torch.nn.Module",
+    candidate: "torch.nn.Module",
+    tensor: "torch.Tensor",
+) -> Dict[str, float]:
+    # Compare per-frame probabilities of two models on the same input batch
+    # (pass held-out frames, not the calibration batch)
+    start = time.perf_counter()
+    expected = predict_probabilities(reference, tensor)
+    reference_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    actual = predict_probabilities(candidate, tensor)
+    candidate_seconds = time.perf_counter() - start
+
+    delta = np.abs(expected - actual)
+    agree = (expected >= CLASSIFICATION_THRESHOLD) == (actual >= CLASSIFICATION_THRESHOLD)
+    return {
+        "frames": int(len(delta)),
+        "maxAbsDelta": round(float(delta.max()), 6),
+        "meanAbsDelta": round(float(delta.mean()), 6),
+        "decisionAgreement": round(float(agree.mean()), 4),
+        "fp32Ms": round(1000.0 * reference_seconds, 3),
+        "int8Ms": round(1000.0 * candidate_seconds, 3),
+    }
+
+
+def build_quantized_detector(
+    model: "torch.nn.Module",
+    mode: str = MODEL_QUANTIZATION_MODE,
+    frames: Optional[Tuple[List[np.ndarray], List[np.ndarray]]] = None,
+    max_delta: float = QUANTIZATION_MAX_DELTA,
+) -> Tuple[Optional["torch.nn.Module"], Dict[str, Any]]:
+    # Quantise on the calibration frames, then check against fp32 on the held-out evaluation frames
+    # frames: (calibration, evaluation), defaults to reference_frames()
+    # Returns (int8 model, report), or (None, report) if the delta exceeds max_delta
+    calibration_frames, evaluation_frames = frames if frames is not None else reference_frames()
+    calibration = preprocess_frames(calibration_frames)
+    evaluation = preprocess_frames(evaluation_frames)
+    if calibration is None or evaluation is None:
+        raise RuntimeError("Failed to preprocess quantization reference frames")
+    quantized = quantize_detector(model, mode, calibration)
+    report: Dict[str, Any] = {"mode": mode, "maxAllowedDelta": max_delta}
+    if mode == "static":
+        report["calibrationFrames"] = int(len(calibration))
+    report.update(accuracy_delta(model, quantized, evaluation))
+    report["accepted"] = report["maxAbsDelta"] <= max_delta
+    return (quantized if report["accepted"] else None), report
+
+
+def quantize_for_inference(model: "torch.nn.Module", weights_path: str) -> "torch.nn.Module":
+    # Loader hook: INT8 model if it passes the accuracy check, else the fp32 model
+    try:
+        quantized, report = build_quantized_detector(model)
+    except Exception as e:
+        logger.warning(f"Quantization failed for {weights_path}, using fp32 model: {e}")
+        report, quantized = {"accepted": False, "error": str(e)}, None
+    with _reports_lock:
+        _reports[str(weights_path)] = report
+    if quantized is None:
+        if "error" not in report:
+            logger.warning(f"Quantized model rejected for {weights_path} (accuracy check: {report}), using fp32")
+        return model
+    logger.info(f"Using INT8 ({report['mode']}) detector for {weights_path}: {report}")
+    return quantized
+
+
+if __name__ == "__main__":
+    # Quantise a weights file and print the accuracy/latency report:
+    # python -m app.models.quantization weights.pth [static|dynamic]
+    import json
+    import sys
+
+    from app.models.detector import load_detector
+
+    fp32 = load_detector(sys.argv[1], quantize=False, optimize=False)
+    if fp32 is None:
+        sys.exit(f"Could not load detector from {sys.argv[1]}")
+    chosen_mode = sys.argv[2] if len(sys.argv) > 2 else MODEL_QUANTIZATION_MODE
+    _, result = build_quantized_detector(fp32, chosen_mode)
+    print(json.dumps(result, indent=2))
@@ -0,0 +1,144 @@
+# Process-wide registry of loaded detector models
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Registry key: (resolved weights path, file mtime in ns)
+RegistryKey = Tuple[str, int]
+
+
+@dataclass
+# RegistryStats: counters used to confirm the warm path never touches disk
+class RegistryStats:
+    hits: int = 0
+    misses: int = 0
+    loads: int = 0
+    load_failures: int = 0
+    total_load_seconds: float = 0.0
+    last_load_seconds: float = 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        # camelCase keys, like every other /api/stats section
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "loads": self.loads,
+            "loadFailures": self.load_failures,
+            "totalLoadSeconds": round(self.total_load_seconds, 4),
+            "lastLoadSeconds": round(self.last_load_seconds, 4),
+        }
+
+
+@dataclass
+# _Entry: one cached model plus the lock that serialises its first load
+class _Entry:
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    loaded: bool = False
+    model: Any = None
+
+
+class ModelRegistry:
+    # Loads each model file once per process and hands out the cached DetectorBackend.
+    # Entries are keyed by path + mtime so replacing the .pth/.onnx on disk triggers a reload.
+
+    def __init__(self, loader: Optional[Callable[[Path], Any]] = None):
+        self._loader = loader
+        self._entries: Dict[RegistryKey, _Entry] = {}
+        self._lock = threading.Lock()
+        self._stats = RegistryStats()
+
+    @staticmethod
+    def _key(weights_path: str | Path) -> Optional[RegistryKey]:
+        # Build cache key from resolved path and mtime, None if file is missing
+        path = Path(weights_path).resolve()
+        try:
+            mtime = path.stat().st_mtime_ns
+        except OSError:
+            return None
+        return str(path), mtime
+
+    def _load(self, path: Path) -> Any:
+        if self._loader is not None:
+            return self._loader(path)
+        from app.models.backends import load_backend
+        return load_backend(path)
+
+    def get(self, weights_path: str | Path) -> Any:
+        # Return cached model for weights_path, loading it once on first use
+        key = self._key(weights_path)
+        if key is None:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.loaded:
+                self._stats.hits += 1
+                return entry.model
+            if entry is None:
+                entry = _Entry()
+                self._entries[key] = entry
+
+        # Concurrent misses for the same key wait here on a single load
+        with entry.lock:
+            if entry.loaded:
+                with self._lock:
+                    self._stats.hits += 1
+                return entry.model
+
+            start = time.perf_counter()
+            model = self._load(Path(key[0]))
+            elapsed = time.perf_counter() - start
+
+            with self._lock:
+                self._stats.misses += 1
+                self._stats.last_load_seconds = elapsed
+                self._stats.total_load_seconds += elapsed
+                if model is None:
+                    # Do not cache failures; the next request retries the load
+                    self._stats.load_failures += 1
+                    self._entries.pop(key, None)
+                    return None
+                self._stats.loads += 1
+                # Drop stale entries for the same path (older mtime)
+                for stale in [k for k in self._entries if k[0] == key[0] and k != key]:
+                    del self._entries[stale]
+
+            entry.model = model
+            entry.loaded = True
+            logger.info("Loaded detector %s in %.3fs", key[0], elapsed)
+            return model
+
+    def stats(self) -> Dict[str, float]:
+        # Snapshot of hit/miss/load-latency counters
+        with self._lock:
+            data = self._stats.as_dict()
+            data["cachedModels"] = sum(1 for e in self._entries.values() if e.loaded)
+        if self._loader is None:
+            try:
+                from app.models.quantization import quantization_reports
+                data["quantization"] = quantization_reports()
+            except ImportError:
+                # PyTorch not installed (onnx-only deployment)
+                data["quantization"] = {}
+        return data
+
+    def clear(self) -> None:
+        # Drop all cached models (e.g. for tests or explicit reloads)
+        with self._lock:
+            self._entries.clear()
+
+
+# Shared registry used by the analysis service
+model_registry = ModelRegistry()
+
+
+def get_detector(weights_path: str | Path) -> Any:
+    # Convenience accessor for the process-wide registry
+    return model_registry.get(weights_path)
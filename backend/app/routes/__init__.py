@@ -1,4 +1,5 @@
 """API routes."""
 from .analyze import router as analyze_router
+from .jobs import router as jobs_router
 
-__all__ = ["analyze_router"]
+__all__ = ["analyze_router", "jobs_router"]
@@ -1,16 +1,31 @@
 # Video upload and AI-generation analysis API
 from __future__ import annotations
 
+import asyncio
+import json
 import logging
 import uuid
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
-from fastapi import APIRouter, File, HTTPException, UploadFile
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
 
-from app.config import UPLOAD_DIR, MAX_VIDEO_SIZE_MB
+from app.config import (
+    BATCH_ALLOWED_DIR,
+    BATCH_MAX_VIDEOS,
+    MAX_VIDEO_SIZE_MB,
+    UPLOAD_DIR,
+)
 from app.exceptions import VideoProcessingError, NoFramesExtractedError
-from app.services.video_analysis import analyze_video
+from app.services.executor import analysis_executor
+from app.services.result_cache import result_cache
+from app.services.video_analysis import AnalysisResult, analyze_video
+from app.utils.hashing import sha256_file
+from app.utils.upload_utils import StoredUpload, UploadRejected, receive_multipart
 
 logger = logging.getLogger(__name__)
 
@@ -18,80 +33,129 @@ router = APIRouter(prefix="/api", tags=["analysis"])
 MAX_BYTES = MAX_VIDEO_SIZE_MB * 1024 * 1024
 
 
-@router.post("/analyze")
-# Analyze uploaded video file
-async def analyze_uploaded_video(video: UploadFile = File(..., description="Video file to analyze")):
+SUPPORTED_EXTENSIONS = (".mp4", ".webm", ".mov", ".avi", ".mkv")
+
+
+def validate_video_filename(filename: Optional[str]) -> str:
+    # Check the upload has a supported video extension, return the file suffix
     # Validate file exists and has content
-    if not video.filename:
+    if not filename:
         raise HTTPException(status_code=400, detail="No file provided")
 
     # Extract and validate file extension
     # We check extension early to avoid wasting time on invalid files
-    filename_lower = video.filename.lower()
-    supported_extensions = (".mp4", ".webm", ".mov", ".avi", ".mkv")
-
-    if not filename_lower.endswith(supported_extensions):
+    filename_lower = filename.lower()
+    if not filename_lower.endswith(SUPPORTED_EXTENSIONS):
         raise HTTPException(
             status_code=400,
-            detail=f"Unsupported video format. Supported: {', '.join(supported_extensions)}",
+            detail=f"Unsupported video format. Supported: {', '.join(SUPPORTED_EXTENSIONS)}",
         )
+    return Path(filename).suffix or ".mp4"
+
+
+def multipart_openapi(**fields: Dict[str, Any]) -> Dict[str, Any]:
+    # OpenAPI request body for routes that parse their multipart body themselves
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {"multipart/form-data": {"schema": {"type": "object", "properties": fields}}},
+        }
+    }
+
+
+VIDEO_FIELD_SCHEMA = {"type": "string", "format": "binary", "description": "Video file to analyze"}
+
+
+async def receive_videos(request: Request, dest_dir: Path) -> Tuple[List[StoredUpload], Dict[str, str]]:
+    # Stream the request's file parts into dest_dir under unique names, validating each
+    # extension before any of its bytes are written. Rejected files (bad extension,
+    # too large, empty) come back with error set and nothing on disk
+    def destination(field: str, filename: str) -> Path:
+        try:
+            suffix = validate_video_filename(filename)
+        except HTTPException as e:
+            raise UploadRejected(e.status_code, e.detail)
+        return dest_dir / f"{uuid.uuid4().hex}{suffix}"
 
-    # Read file content
     try:
-        content = await video.read()
-    except Exception as e:
-        logger.error(f"Error reading uploaded file: {e}")
+        uploads, fields = await receive_multipart(request, destination, MAX_BYTES)
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except ClientDisconnect:
         raise HTTPException(status_code=400, detail="Could not read uploaded file")
 
-    # Validate file is not empty
-    if len(content) == 0:
-        raise HTTPException(status_code=400, detail="Uploaded file is empty")
+    for upload in uploads:
+        # Validate file is not empty
+        if upload.error is None and upload.size == 0:
+            upload.discard()
+            upload.error, upload.status_code = "Uploaded file is empty", 400
+    return uploads, fields
 
-    # Validate file size (prevent memory exhaustion)
-    if len(content) > MAX_BYTES:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Video file too large ({ len(content) / 1024 / 1024:.1f}MB). Maximum: {MAX_VIDEO_SIZE_MB}MB",
-        )
 
-    # Create temporary file with unique name
+async def receive_single_video(request: Request, dest_dir: Path) -> StoredUpload:
+    # The one "video" file of a request, stored in dest_dir; HTTPException if missing or invalid
+    uploads, _ = await receive_videos(request, dest_dir)
+    videos = [upload for upload in uploads if upload.field == "video"]
+    for upload in uploads:
+        if not videos or upload is not videos[0]:
+            upload.discard()
+    if not videos:
+        raise HTTPException(status_code=400, detail="No file provided")
+    video = videos[0]
+    if video.error is not None:
+        raise HTTPException(status_code=video.status_code, detail=video.error)
+    return video
+
+
+def build_analysis_response(result: AnalysisResult, cached: bool, analyzed_at: Optional[str] = None) -> Dict[str, Any]:
+    # API response schema (AI-generation focused) shared by the sync and job endpoints
+    return {
+        "isAIGenerated": result.is_ai_generated,
+        "confidence": result.confidence,
+        "riskLevel": result.risk_level,
+        "detectionMethod": result.detection_method,
+        "frameCount": result.frame_count,
+        "processingTime": result.processing_time_seconds,
+        # Current timestamp (ISO 8601 format) unless the result was produced earlier
+        "analyzedAt": analyzed_at or datetime.now(timezone.utc).isoformat(),
+        # True when served from the result cache without decoding the video
+        "cached": cached,
+        # Include detail breakdown if available
+        "detailBreakdown": result.details or {},
+    }
+
+
+@router.post("/analyze", openapi_extra=multipart_openapi(video=VIDEO_FIELD_SCHEMA))
+# Analyze uploaded video file (multipart field "video")
+async def analyze_uploaded_video(request: Request):
+    # Body is parsed as it arrives and written once, under a unique name in UPLOAD_DIR
     # UUID prevents filename collisions if multiple uploads occur simultaneously
-    suffix = Path(video.filename).suffix or ".mp4"
-    safe_name = f"{uuid.uuid4().hex}{suffix}"
-    file_path = UPLOAD_DIR / safe_name
+    video = await receive_single_video(request, UPLOAD_DIR)
+    file_path = video.path
+    safe_name = file_path.name
+    content_hash = video.content_hash
 
     try:
-        # Write uploaded content to temporary file
-        file_path.write_bytes(content)
+        # Repeat uploads are served from the content-addressed result cache
+        result = result_cache.get(content_hash)
+        cached = result is not None
 
-        # Run analysis
-        try:
-            result = analyze_video(file_path)
-        except (VideoProcessingError, NoFramesExtractedError) as e:
-            # Expected error during video processing
-            logger.warning(f"Video processing error: {e}")
-            raise HTTPException(status_code=400, detail=f"Invalid video: {str(e)}")
-
-        # Get current timestamp (ISO 8601 format)
-        analyzed_at = datetime.now(timezone.utc).isoformat()
-
-        # Build response with new schema (AI-generation focused)
-        response = {
-            "isAIGenerated": result.is_ai_generated,
-            "confidence": result.confidence,
-            "riskLevel": result.risk_level,
-            "detectionMethod": result.detection_method,
-            "frameCount": result.frame_count,
-            "processingTime": result.processing_time_seconds,
-            "analyzedAt": analyzed_at,
-            # Include detail breakdown if available
-            "detailBreakdown": result.details or {},
-        }
+        if result is None:
+            # Run analysis on the worker pool so the event loop stays responsive
+            try:
+                result = await analysis_executor.run(analyze_video, file_path)
+            except (VideoProcessingError, NoFramesExtractedError) as e:
+                # Expected error during video processing
+                logger.warning(f"Video processing error: {e}")
+                raise HTTPException(status_code=400, detail=f"Invalid video: {str(e)}")
+            result_cache.put(content_hash, result)
+
+        response = build_analysis_response(result, cached)
 
         logger.info(
             f"Analysis successful: file={video.filename}, "
             f"isAIGenerated={result.is_ai_generated}, "
-            f"confidence={result.confidence}"
+            f"confidence={result.confidence}, cached={cached}"
         )
 
         return response
@@ -115,3 +179,148 @@ async def analyze_uploaded_video(video: UploadFile = File(..., description="Vide
                 logger.debug(f"Deleted temporary file: {safe_name}")
             except OSError as e:
                 logger.warning(f"Could not delete temporary file {safe_name}: {e}")
+
+
+def resolve_manifest_path(entry: Any) -> Path:
+    # Map a manifest entry to a video file inside BATCH_ALLOWED_DIR (relative entries are
+    # taken relative to it); symlinks and ".." are resolved before the containment check
+    if not isinstance(entry, str) or not entry:
+        raise HTTPException(status_code=400, detail="Manifest entries must be non-empty path strings")
+    root = Path(BATCH_ALLOWED_DIR).resolve()
+    path = (root / entry).resolve()
+    if not path.is_relative_to(root):
+        raise HTTPException(status_code=400, detail="Path is outside the allowed directory")
+    if not path.is_file():
+        raise HTTPException(status_code=400, detail="File not found")
+    validate_video_filename(path.name)
+    return path
+
+
+class BatchItem:
+    # One video of a batch request: an upload stored under UPLOAD_DIR or a manifest path
+
+    def __init__(self, index: int, name: str):
+        self.index = index
+        self.name = name
+        self.path: Optional[Path] = None
+        self.content_hash: Optional[str] = None
+        # Uploaded copies are deleted after analysis, manifest files never are
+        self.temporary = False
+        self.error: Optional[str] = None
+
+    def line(self, **fields: Any) -> str:
+        # One NDJSON line of the response stream
+        return json.dumps({"index": self.index, "name": self.name, **fields}) + "\n"
+
+
+async def _analyze_batch_item(item: BatchItem, in_flight: Dict[str, "asyncio.Future[AnalysisResult]"]) -> str:
+    # Result line for one video; cache lookup, then analysis on the shared worker pool
+    # Identical videos within the batch share one analysis through in_flight (by content hash)
+    if item.error is not None:
+        return item.line(status="failed", error=item.error)
+    try:
+        if item.content_hash is None:
+            item.content_hash = await run_in_threadpool(sha256_file, item.path)
+        result = result_cache.get(item.content_hash)
+        cached = result is not None
+        if result is None:
+            pending = in_flight.get(item.content_hash)
+            if pending is None:
+                pending = asyncio.ensure_future(analysis_executor.run(analyze_video, item.path))
+                in_flight[item.content_hash] = pending
+                result = await pending
+                result_cache.put(item.content_hash, result)
+            else:
+                result = await asyncio.shield(pending)
+                cached = True
+        return item.line(status="done", result=build_analysis_response(result, cached))
+    except (VideoProcessingError, NoFramesExtractedError) as e:
+        logger.warning(f"Batch item {item.name}: video processing error: {e}")
+        return item.line(status="failed", error=f"Invalid video: {e}")
+    except Exception as e:
+        logger.exception(f"Batch item {item.name}: unexpected error: {e}")
+        return item.line(status="failed", error="An unexpected error occurred during analysis.")
+    finally:
+        if item.temporary and item.path is not None:
+            item.path.unlink(missing_ok=True)
+
+
+async def _stream_batch(items: List[BatchItem]) -> AsyncIterator[str]:
+    # Every item is submitted at once (the pool bounds concurrency and the inference
+    # batcher coalesces their frames); lines are sent in completion order
+    in_flight: Dict[str, "asyncio.Future[AnalysisResult]"] = {}
+    tasks = [asyncio.ensure_future(_analyze_batch_item(item, in_flight)) for item in items]
+    try:
+        for next_line in asyncio.as_completed(tasks):
+            yield await next_line
+    finally:
+        # Client went away: drop queued work and uploads no finished task removed
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for item in items:
+            if item.temporary and item.path is not None:
+                item.path.unlink(missing_ok=True)
+
+
+@router.post(
+    "/analyze/batch",
+    openapi_extra=multipart_openapi(
+        videos={"type": "array", "items": {"type": "string", "format": "binary"}, "description": "Video files to analyze"},
+        manifest={"type": "string", "description": "JSON list of video paths under the allowed directory"},
+    ),
+)
+# Analyze many videos in one request: uploaded files (form field "videos", repeated) and/or
+# a JSON list of paths under BATCH_ALLOWED_DIR (form field "manifest"). Streams one NDJSON
+# line per video as each finishes: {index, name, status: "done", result} or
+# {index, name, status: "failed", error}; index is the video's position in the request
+async def analyze_video_batch(request: Request):
+    # Uploads are written once into UPLOAD_DIR while the body arrives; total size is
+    # bounded by UploadSizeLimitMiddleware (BATCH_MAX_TOTAL_MB)
+    uploads, fields = await receive_videos(request, UPLOAD_DIR)
+    videos = [upload for upload in uploads if upload.field == "videos"]
+    try:
+        for upload in uploads:
+            if upload.field != "videos":
+                upload.discard()
+
+        entries: List[Any] = []
+        manifest = fields.get("manifest")
+        if manifest:
+            try:
+                entries = json.loads(manifest)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Manifest must be a JSON list of paths")
+            if not isinstance(entries, list):
+                raise HTTPException(status_code=400, detail="Manifest must be a JSON list of paths")
+            if not BATCH_ALLOWED_DIR:
+                raise HTTPException(status_code=400, detail="Manifest batches are disabled (BATCH_ALLOWED_DIR is not set)")
+
+        total = len(videos) + len(entries)
+        if total == 0:
+            raise HTTPException(status_code=400, detail="No videos provided")
+        if total > BATCH_MAX_VIDEOS:
+            raise HTTPException(status_code=400, detail=f"Too many videos in batch. Maximum: {BATCH_MAX_VIDEOS}")
+    except BaseException:
+        for upload in videos:
+            upload.discard()
+        raise
+
+    # Invalid videos fail individually in the stream instead of failing the whole batch
+    items: List[BatchItem] = []
+    for upload in videos:
+        item = BatchItem(len(items), upload.filename)
+        item.path, item.content_hash, item.error = upload.path, upload.content_hash or None, upload.error
+        item.temporary = True
+        items.append(item)
+
+    for entry in entries:
+        item = BatchItem(len(items), entry if isinstance(entry, str) else str(entry))
+        items.append(item)
+        try:
+            item.path = resolve_manifest_path(entry)
+        except HTTPException as e:
+            item.error = e.detail
+
+    logger.info(f"Batch analysis of {len(items)} videos ({len(videos)} uploads, {len(entries)} manifest paths)")
+    return StreamingResponse(_stream_batch(items), media_type="application/x-ndjson")
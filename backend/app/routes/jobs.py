@@ -0,0 +1,164 @@
+# Asynchronous analysis jobs API: submit a video, poll or stream its progress, fetch the result
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from dataclasses import asdict
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, Optional
+
+from fastapi import APIRouter, Header, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from app.config import JOBS_DIR
+from app.routes.analyze import VIDEO_FIELD_SCHEMA, build_analysis_response, multipart_openapi, receive_single_video
+from app.services.jobs import Job, job_runner, job_store
+from app.services.result_cache import result_cache
+from app.services.video_analysis import AnalysisResult
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api", tags=["jobs"])
+
+# How often an event stream checks the job table for new events
+JOB_EVENTS_POLL_SECONDS = 0.25
+# Comment line sent on idle streams so proxies keep the connection open
+JOB_EVENTS_KEEPALIVE_SECONDS = 15.0
+
+
+def _timestamp(seconds: float | None) -> str | None:
+    if seconds is None:
+        return None
+    return datetime.fromtimestamp(seconds, timezone.utc).isoformat()
+
+
+def job_status(job: Job) -> dict:
+    # Job status schema returned by submit and poll
+    return {
+        "jobId": job.id,
+        "filename": job.filename,
+        "status": job.status,
+        "stage": job.stage,
+        "framesDecoded": job.frames_decoded,
+        "attempts": job.attempts,
+        "error": job.error,
+        "createdAt": _timestamp(job.created_at),
+        "updatedAt": _timestamp(job.updated_at),
+        "finishedAt": _timestamp(job.finished_at),
+        "statusUrl": f"/api/jobs/{job.id}",
+        "eventsUrl": f"/api/jobs/{job.id}/events",
+        "resultUrl": f"/api/jobs/{job.id}/result",
+    }
+
+
+def _get_job(job_id: str) -> Job:
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.post("/jobs", status_code=202, openapi_extra=multipart_openapi(video=VIDEO_FIELD_SCHEMA))
+# Queue a video (multipart field "video") for analysis and return immediately with a job id
+async def submit_job(request: Request):
+    video = await receive_single_video(request, JOBS_DIR)
+    file_path = video.path
+
+    job_id = uuid.uuid4().hex
+    try:
+        # Repeat uploads complete at once from the result cache, no queueing
+        cached = result_cache.get(video.content_hash)
+        job = job_store.create(
+            job_id,
+            video.filename,
+            file_path,
+            video.content_hash,
+            result=asdict(cached) if cached is not None else None,
+        )
+    except BaseException:
+        file_path.unlink(missing_ok=True)
+        raise
+
+    if job.status == "done":
+        file_path.unlink(missing_ok=True)
+    else:
+        job_runner.notify()
+
+    logger.info(f"Job {job_id} queued: file={video.filename}, status={job.status}")
+    return job_status(job)
+
+
+@router.get("/jobs/{job_id}")
+# Poll job status and progress
+def get_job(job_id: str):
+    return job_status(_get_job(job_id))
+
+
+@router.get("/jobs/{job_id}/result")
+# Analysis result of a finished job (same schema as POST /api/analyze)
+def get_job_result(job_id: str):
+    job = _get_job(job_id)
+    if job.status == "failed":
+        raise HTTPException(status_code=422, detail=job.error or "Analysis failed")
+    if job.status != "done" or job.result is None:
+        return JSONResponse(job_status(job), status_code=409)
+    return _job_result(job)
+
+
+def _job_result(job: Job) -> Dict[str, Any]:
+    return build_analysis_response(AnalysisResult(**job.result), job.cached, _timestamp(job.finished_at))
+
+
+def _sse(event: str, data: Dict[str, Any], event_id: Optional[int] = None) -> str:
+    # One server-sent event; the id lets EventSource resume via Last-Event-ID
+    lines = [f"id: {event_id}"] if event_id is not None else []
+    lines += [f"event: {event}", f"data: {json.dumps(data)}"]
+    return "\n".join(lines) + "\n\n"
+
+
+async def _job_event_stream(job_id: str, after_seq: int, request: Request) -> AsyncIterator[str]:
+    # Replays recorded progress events after after_seq, then follows new ones until the job
+    # finishes with a "result" or "error" event. Events are read from the shared job table,
+    # so any server process can serve the stream of a job running in another
+    last_sent = time.monotonic()
+    while True:
+        # Read the job before its events: every event of a finished job is then already visible
+        job = await run_in_threadpool(job_store.get, job_id)
+        if job is None:
+            yield _sse("error", {"detail": "Job not found"})
+            return
+        for event in await run_in_threadpool(job_store.events, job_id, after_seq):
+            after_seq = event["seq"]
+            yield _sse("progress", {"stage": event["stage"], **event["data"]}, after_seq)
+            last_sent = time.monotonic()
+
+        if job.status == "done":
+            yield _sse("result", _job_result(job))
+            return
+        if job.status == "failed":
+            yield _sse("error", {"detail": job.error or "Analysis failed"})
+            return
+        if await request.is_disconnected():
+            return
+        if time.monotonic() - last_sent >= JOB_EVENTS_KEEPALIVE_SECONDS:
+            yield ": keep-alive\n\n"
+            last_sent = time.monotonic()
+        await asyncio.sleep(JOB_EVENTS_POLL_SECONDS)
+
+
+@router.get("/jobs/{job_id}/events")
+# Server-sent event stream of job progress: "progress" events (stage plus running scores),
+# then one "result" (same schema as /api/analyze) or "error" event
+async def stream_job_events(job_id: str, request: Request, last_event_id: Optional[str] = Header(None)):
+    _get_job(job_id)
+    after_seq = int(last_event_id) if last_event_id and last_event_id.isdigit() else 0
+    return StreamingResponse(
+        _job_event_stream(job_id, after_seq, request),
+        media_type="text/event-stream",
+        # Disable proxy buffering so events arrive as they are produced
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,4 +1,6 @@
 """Backend services."""
 from .video_analysis import analyze_video, AnalysisResult
+from .executor import AnalysisExecutor, analysis_executor
+from .result_cache import ResultCache, result_cache
 
-__all__ = ["analyze_video", "AnalysisResult"]
+__all__ = ["analyze_video", "AnalysisResult", "AnalysisExecutor", "analysis_executor", "ResultCache", "result_cache"]
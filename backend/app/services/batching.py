@@ -0,0 +1,179 @@
+# Cross-request dynamic batching for detector inference
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+import numpy as np
+
+from app.config import INFERENCE_BATCH_MAX_FRAMES, INFERENCE_BATCH_MAX_WAIT_MS
+
+logger = logging.getLogger(__name__)
+
+
+class _Request:
+    # One caller's preprocessed micro-batch waiting for a forward pass
+
+    __slots__ = ("model", "tensor", "future", "enqueued")
+
+    def __init__(self, model: Any, tensor: Any, future: Future, enqueued: float):
+        self.model = model
+        self.tensor = tensor
+        self.future = future
+        self.enqueued = enqueued
+
+
+class DynamicBatcher:
+    # Coalesces frame tensors submitted by concurrent analyses into shared forward passes
+    # A batch fires once max_frames rows for the same model are queued, or when the
+    # oldest request has waited max_wait_ms, so batching adds at most max_wait_ms of
+    # latency. Results are split back per request and delivered through futures
+
+    def __init__(
+        self,
+        max_frames: int = INFERENCE_BATCH_MAX_FRAMES,
+        max_wait_ms: float = INFERENCE_BATCH_MAX_WAIT_MS,
+        forward: Optional[Callable[[Any, Any], np.ndarray]] = None,
+    ):
+        self.max_frames = max(1, int(max_frames))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._forward = forward
+        self._queue: Deque[_Request] = deque()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._batches = 0
+        self._requests = 0
+        self._frames = 0
+        self._failed = 0
+        self._total_wait = 0.0
+        self._max_wait_seen = 0.0
+        self._total_forward = 0.0
+
+    def submit(self, model: Any, tensor: np.ndarray) -> Future:
+        # Queue a [N, 3, H, W] blob for a DetectorBackend, future resolves to N probabilities
+        future: Future = Future()
+        with self._cond:
+            alive = self._thread is not None and self._thread.is_alive()
+            if self._closed:
+                if alive:
+                    raise RuntimeError("Inference batcher is shutting down")
+                # Reopen after a completed shutdown (e.g. app lifespan restarted in-process)
+                self._closed = False
+            if not alive:
+                # Started lazily so importing the module (or forking) never starts a thread
+                self._thread = threading.Thread(target=self._loop, name="inference-batcher", daemon=True)
+                self._thread.start()
+            self._queue.append(_Request(model, tensor, future, time.monotonic()))
+            self._cond.notify()
+        return future
+
+    def _take_batch(self) -> List[_Request]:
+        # Block until a batch is due, then pop it; empty list means shut down
+        with self._cond:
+            while True:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue:
+                    return []
+                head = self._queue[0]
+                same_model = [r for r in self._queue if r.model is head.model]
+                rows = sum(len(r.tensor) for r in same_model)
+                remaining = head.enqueued + self.max_wait - time.monotonic()
+                if rows >= self.max_frames or remaining <= 0 or self._closed:
+                    break
+                self._cond.wait(remaining)
+
+            # Oldest first; a single request larger than max_frames still runs alone
+            batch: List[_Request] = []
+            total = 0
+            for request in same_model:
+                if batch and total + len(request.tensor) > self.max_frames:
+                    break
+                batch.append(request)
+                total += len(request.tensor)
+            for request in batch:
+                self._queue.remove(request)
+            return batch
+
+    def _loop(self) -> None:
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                return
+            self._run(batch)
+
+    def _run(self, batch: List[_Request]) -> None:
+        batch = [r for r in batch if r.future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        started = time.monotonic()
+        try:
+            if len(batch) == 1:
+                tensor = batch[0].tensor
+            else:
+                tensor = np.concatenate([r.tensor for r in batch])
+            if self._forward is not None:
+                probs = self._forward(batch[0].model, tensor)
+            else:
+                probs = batch[0].model.predict(tensor)
+        except Exception as e:
+            logger.error(f"Batched inference failed for {len(batch)} requests: {e}")
+            with self._cond:
+                self._failed += len(batch)
+            for request in batch:
+                request.future.set_exception(e)
+            return
+        elapsed = time.monotonic() - started
+
+        offset = 0
+        for request in batch:
+            n = len(request.tensor)
+            request.future.set_result(probs[offset:offset + n])
+            offset += n
+
+        waits = [started - r.enqueued for r in batch]
+        with self._cond:
+            self._batches += 1
+            self._requests += len(batch)
+            self._frames += offset
+            self._total_wait += sum(waits)
+            self._max_wait_seen = max(self._max_wait_seen, max(waits))
+            self._total_forward += elapsed
+
+    def stats(self) -> Dict[str, Any]:
+        # Batch fill and queueing delay, for tuning max_frames / max_wait_ms
+        with self._cond:
+            batches = self._batches or 1
+            requests = self._requests or 1
+            return {
+                "maxFrames": self.max_frames,
+                "maxWaitMs": round(self.max_wait * 1000.0, 3),
+                "queued": len(self._queue),
+                "batches": self._batches,
+                "requests": self._requests,
+                "frames": self._frames,
+                "failed": self._failed,
+                "avgFramesPerBatch": round(self._frames / batches, 3),
+                "avgRequestsPerBatch": round(self._requests / batches, 3),
+                "avgWaitMs": round(1000.0 * self._total_wait / requests, 3),
+                "maxWaitSeenMs": round(1000.0 * self._max_wait_seen, 3),
+                "avgForwardMs": round(1000.0 * self._total_forward / batches, 3),
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        # Run whatever is queued, then stop the scheduler thread
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread
+        if wait and thread is not None:
+            thread.join()
+
+
+# Shared batcher used by every analysis in this process
+inference_batcher = DynamicBatcher()
@@ -0,0 +1,177 @@
+# Bounded worker pool for CPU-heavy analysis, keeps the event loop free for I/O
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional
+
+from app.config import ANALYSIS_POOL_TYPE, ANALYSIS_POOL_TYPES, ANALYSIS_WORKERS, WARMUP_ON_STARTUP
+from app.exceptions import ConfigurationError
+from app.services.warmup import warm_worker
+
+logger = logging.getLogger(__name__)
+
+class AnalysisExecutor:
+    # Runs blocking callables on a thread or process pool and tracks queue depth/utilisation
+
+    def __init__(
+        self,
+        max_workers: int = ANALYSIS_WORKERS,
+        pool_type: str = ANALYSIS_POOL_TYPE,
+        initializer: Optional[Callable[[Any], None]] = None,
+    ):
+        if pool_type not in ANALYSIS_POOL_TYPES:
+            raise ConfigurationError(
+                f"Invalid ANALYSIS_POOL_TYPE '{pool_type}'. Expected one of: {', '.join(ANALYSIS_POOL_TYPES)}"
+            )
+        self.max_workers = max(1, int(max_workers))
+        self.pool_type = pool_type
+        # Run once in every worker process before its first task (process pools only), with
+        # a queue to report back to this process on (read through start_workers)
+        self.initializer = initializer
+        self._reports: Any = None
+        self._pool: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._completed = 0
+        self._failed = 0
+        self._restarts = 0
+
+    def _get_pool(self) -> Executor:
+        # Create pool lazily so importing the module never spawns workers
+        with self._lock:
+            if self._pool is None:
+                if self.pool_type == "process":
+                    # Spawn avoids forking a parent that already holds torch/OpenCV threads
+                    context = multiprocessing.get_context("spawn")
+                    if self.initializer is not None:
+                        if self._reports is None:
+                            self._reports = context.Queue()
+                        # Reports of a previous (broken) pool's workers are no longer wanted
+                        self._drain_reports()
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=context,
+                        initializer=self.initializer,
+                        initargs=(self._reports,) if self.initializer is not None else (),
+                    )
+                else:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix="analysis",
+                    )
+                logger.info("Started %s analysis pool with %d workers", self.pool_type, self.max_workers)
+            return self._pool
+
+    def _drain_reports(self) -> None:
+        try:
+            while True:
+                self._reports.get_nowait()
+        except queue.Empty:
+            pass
+
+    def start_workers(self, timeout: float) -> List[Any]:
+        # Start every worker process of a process pool now instead of on demand and wait until
+        # each one's initializer has reported; returns the max_workers reports (empty without an
+        # initializer or for thread pools). Raises TimeoutError if a worker does not report in time
+        if self.pool_type != "process":
+            return []
+        # Submits made while no worker is idle each start a process, up to max_workers
+        futures = [self.submit(os.getpid) for _ in range(self.max_workers)]
+        if self.initializer is None:
+            for future in futures:
+                future.result(timeout)
+            return []
+        deadline = time.monotonic() + timeout
+        reports = []
+        while len(reports) < self.max_workers:
+            try:
+                reports.append(self._reports.get(timeout=max(0.0, deadline - time.monotonic())))
+            except queue.Empty:
+                raise TimeoutError(
+                    f"{self.max_workers - len(reports)} of {self.max_workers} analysis workers "
+                    f"did not finish starting within {timeout:.0f}s"
+                ) from None
+        return reports
+
+    def _discard_pool(self, pool: Executor) -> None:
+        # Forget a process pool broken by a dead worker so the next submit starts (and, through
+        # the initializer, warms) a fresh one. The broken pool already terminated its workers
+        # and failed their futures; only the first caller for a given pool replaces it
+        with self._lock:
+            if self._pool is not pool:
+                return
+            self._pool = None
+            self._restarts += 1
+        logger.warning("Analysis worker process died, restarting the process pool")
+
+    def _on_done(self, pool: Executor, future: Future) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            if future.cancelled() or future.exception() is not None:
+                self._failed += 1
+            else:
+                self._completed += 1
+        if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+            self._discard_pool(pool)
+
+    def _submit_to(self, pool: Executor, fn: Callable[..., Any], args: tuple, kwargs: dict) -> Future:
+        with self._lock:
+            self._in_flight += 1
+        try:
+            future = pool.submit(fn, *args, **kwargs)
+        except Exception:
+            with self._lock:
+                self._in_flight -= 1
+            raise
+        future.add_done_callback(partial(self._on_done, pool))
+        return future
+
+    def submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        # Submit to the pool and return a concurrent future
+        # A pool broken by a crashed worker is replaced and the submit retried once; only the
+        # tasks that were running or queued in the broken pool fail (with BrokenProcessPool)
+        pool = self._get_pool()
+        try:
+            return self._submit_to(pool, fn, args, kwargs)
+        except BrokenProcessPool:
+            self._discard_pool(pool)
+            return self._submit_to(self._get_pool(), fn, args, kwargs)
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        # Await a blocking callable without stalling the event loop
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def stats(self) -> Dict[str, Any]:
+        # Queue depth and utilisation snapshot for pool sizing
+        with self._lock:
+            in_flight = self._in_flight
+            active = min(in_flight, self.max_workers)
+            return {
+                "poolType": self.pool_type,
+                "maxWorkers": self.max_workers,
+                "active": active,
+                "queued": in_flight - active,
+                "utilisation": round(active / self.max_workers, 4),
+                "completed": self._completed,
+                "failed": self._failed,
+                "poolRestarts": self._restarts,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=True)
+
+
+# Shared executor used by the API routes
+analysis_executor = AnalysisExecutor(initializer=warm_worker if WARMUP_ON_STARTUP else None)
@@ -0,0 +1,164 @@
+# Cross-frame face tracking: full detection on keyframes, template tracking in between
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from app.constants import (
+    FACE_TRACK_IOU_THRESHOLD,
+    FACE_TRACK_KEYFRAME_INTERVAL,
+    FACE_TRACK_MIN_SCORE,
+    FACE_TRACK_SEARCH_MARGIN,
+)
+from app.utils.face_detection import FaceDetector, downscale_for_detection
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+# FaceTrack: one face identity followed across sampled frames
+class FaceTrack:
+    track_id: int
+    # Sampled frame index -> box (x, y, w, h) in original-frame coordinates
+    boxes: Dict[int, np.ndarray] = field(default_factory=dict)
+    active: bool = True
+    # Grayscale patch at tracking scale, matched against the next frame
+    template: Optional[np.ndarray] = None
+
+    @property
+    def last_box(self) -> np.ndarray:
+        return self.boxes[max(self.boxes)]
+
+    @property
+    def length(self) -> int:
+        return len(self.boxes)
+
+
+def _iou(a: np.ndarray, b: np.ndarray) -> float:
+    ax2, ay2 = a[0] + a[2], a[1] + a[3]
+    bx2, by2 = b[0] + b[2], b[1] + b[3]
+    iw = max(0, min(ax2, bx2) - max(a[0], b[0]))
+    ih = max(0, min(ay2, by2) - max(a[1], b[1]))
+    inter = iw * ih
+    union = a[2] * a[3] + b[2] * b[3] - inter
+    return float(inter / union) if union > 0 else 0.0
+
+
+class FaceTracker:
+    # Runs the detector on every keyframe_interval-th sampled frame (and whenever no
+    # face is being tracked) and propagates boxes between keyframes by matching each
+    # track's template in a search window around its previous position
+
+    def __init__(
+        self,
+        detector: FaceDetector,
+        keyframe_interval: int = FACE_TRACK_KEYFRAME_INTERVAL,
+        iou_threshold: float = FACE_TRACK_IOU_THRESHOLD,
+        min_score: float = FACE_TRACK_MIN_SCORE,
+        search_margin: float = FACE_TRACK_SEARCH_MARGIN,
+    ):
+        self.detector = detector
+        self.keyframe_interval = max(1, keyframe_interval)
+        self.iou_threshold = iou_threshold
+        self.min_score = min_score
+        self.search_margin = search_margin
+        self.tracks: List[FaceTrack] = []
+        self.detector_calls = 0
+        self._frame_idx = 0
+        self._next_id = 0
+
+    @property
+    def active_tracks(self) -> List[FaceTrack]:
+        return [t for t in self.tracks if t.active]
+
+    def update(self, bgr: np.ndarray, gray: np.ndarray) -> np.ndarray:
+        # Process the next sampled frame, returns boxes [K, 4] for this frame
+        idx = self._frame_idx
+        self._frame_idx += 1
+
+        small, scale = downscale_for_detection(gray, self.detector.max_side)
+        is_keyframe = idx % self.keyframe_interval == 0 or not self.active_tracks
+
+        # Predict every track's box in this frame first; on keyframes the prediction is
+        # what detections are matched against, so fast-moving faces keep their identity
+        self._propagate(idx, small, scale, drop_lost=not is_keyframe)
+        if is_keyframe:
+            self.detector_calls += 1
+            detections = self.detector.detect(bgr, gray)
+            self._associate(idx, detections, small, scale)
+
+        boxes = [t.boxes[idx] for t in self.tracks if t.active and idx in t.boxes]
+        return np.array(boxes, dtype=np.int32).reshape(-1, 4)
+
+    def _template(self, small: np.ndarray, box: np.ndarray, scale: float) -> Optional[np.ndarray]:
+        x, y, w, h = (int(round(v * scale)) for v in box)
+        patch = small[max(0, y):y + h, max(0, x):x + w]
+        return patch.copy() if patch.size and min(patch.shape) >= 4 else None
+
+    def _associate(self, idx: int, detections: np.ndarray, small: np.ndarray, scale: float) -> None:
+        # Keyframe: detector output is authoritative; greedy IoU match to active tracks.
+        # Predicted boxes for this frame are replaced by the matched detection
+        unmatched = list(range(len(detections)))
+        for track in self.active_tracks:
+            predicted = track.boxes.pop(idx, None)
+            reference = predicted if predicted is not None else track.last_box
+            best, best_iou = None, self.iou_threshold
+            for i in unmatched:
+                overlap = _iou(reference, detections[i])
+                if overlap >= best_iou:
+                    best, best_iou = i, overlap
+            if best is None:
+                track.active = False
+                continue
+            unmatched.remove(best)
+            track.boxes[idx] = detections[best]
+            track.template = self._template(small, detections[best], scale)
+
+        for i in unmatched:
+            track = FaceTrack(track_id=self._next_id)
+            self._next_id += 1
+            track.boxes[idx] = detections[i]
+            track.template = self._template(small, detections[i], scale)
+            self.tracks.append(track)
+
+    def _propagate(self, idx: int, small: np.ndarray, scale: float, drop_lost: bool = True) -> None:
+        # Normalised cross-correlation template search per track around its last box.
+        # Lost tracks are deactivated when drop_lost, else left for keyframe association
+        sh, sw = small.shape[:2]
+        for track in self.active_tracks:
+            template = track.template
+            if template is None:
+                track.active = not drop_lost
+                continue
+            th, tw = template.shape[:2]
+            px, py = (int(round(v * scale)) for v in track.last_box[:2])
+            mx, my = int(tw * self.search_margin), int(th * self.search_margin)
+            x0, y0 = max(0, px - mx), max(0, py - my)
+            x1, y1 = min(sw, px + tw + mx), min(sh, py + th + my)
+            window = small[y0:y1, x0:x1]
+            if window.shape[0] < th or window.shape[1] < tw:
+                track.active = not drop_lost
+                continue
+
+            result = cv2.matchTemplate(window, template, cv2.TM_CCOEFF_NORMED)
+            _, score, _, (bx, by) = cv2.minMaxLoc(result)
+            if score < self.min_score:
+                # Lost; the next frame becomes a keyframe if nothing else is tracked
+                track.active = not drop_lost
+                continue
+
+            nx, ny = x0 + bx, y0 + by
+            w, h = track.last_box[2:]
+            track.boxes[idx] = np.array([round(nx / scale), round(ny / scale), w, h], dtype=np.int32)
+            track.template = small[ny:ny + th, nx:nx + tw].copy()
+
+    def summary(self) -> Dict[str, int]:
+        return {
+            "face_tracks": len(self.tracks),
+            "longest_face_track": max((t.length for t in self.tracks), default=0),
+            "face_detector_calls": self.detector_calls,
+        }
@@ -0,0 +1,580 @@
+# Asynchronous analysis jobs: SQLite-backed queue, progress event log and a bounded runner
+from __future__ import annotations
+
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from functools import partial
+from pathlib import Path
+from typing import Any, Collection, Dict, Iterator, List, Optional
+
+from app.config import (
+    JOB_MAX_ATTEMPTS,
+    JOB_RETENTION_HOURS,
+    JOB_STALE_SECONDS,
+    JOB_WORKERS,
+    JOBS_DB_PATH,
+)
+from app.exceptions import NoFramesExtractedError, VideoProcessingError
+
+logger = logging.getLogger(__name__)
+
+JOB_STATUSES = ("queued", "running", "done", "failed")
+
+# Minimum seconds between recorded per-frame progress events (other events always record)
+JOB_PROGRESS_INTERVAL = 0.2
+
+
+def _boot_id() -> str:
+    try:
+        return Path("/proc/sys/kernel/random/boot_id").read_text().strip()
+    except OSError:
+        return ""
+
+
+# Claim owner of this server process: host and boot (pids are only comparable within one
+# boot of one machine), pid, and a per-process token that tells this process apart from
+# an earlier one that had the same pid. Empty host when the boot id is unavailable
+_BOOT_ID = _boot_id()
+OWNER_HOST = f"{socket.gethostname()}:{_BOOT_ID}" if _BOOT_ID else ""
+OWNER_TOKEN = uuid.uuid4().hex
+
+
+def _new_owner_token() -> None:
+    global OWNER_TOKEN
+    OWNER_TOKEN = uuid.uuid4().hex
+
+
+# Workers forked from a preloaded master (gunicorn preload_app) would otherwise all share
+# the master's token; each forked process is its own owner
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_new_owner_token)
+
+
+def _claimed_here(host: Optional[str], pid: Optional[int], token: Optional[str]) -> bool:
+    return bool(OWNER_HOST) and host == OWNER_HOST and pid == os.getpid() and token == OWNER_TOKEN
+
+
+def _owner_alive(host: Optional[str], pid: Optional[int], token: Optional[str]) -> Optional[bool]:
+    # Whether the process that claimed a job still runs: None when that cannot be told
+    # (claimed on another machine, or no boot id), False after a reboot or once it exited
+    if not OWNER_HOST or not host or pid is None:
+        return None
+    hostname, _, boot = host.rpartition(":")
+    if hostname != socket.gethostname():
+        return None
+    if boot != _BOOT_ID:
+        return False
+    if pid == os.getpid():
+        return token == OWNER_TOKEN
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    filename TEXT NOT NULL,
+    path TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    status TEXT NOT NULL,
+    stage TEXT,
+    frames_decoded INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    cached INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    finished_at REAL,
+    owner_host TEXT,
+    owner_pid INTEGER,
+    owner_token TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at);
+CREATE TABLE IF NOT EXISTS job_events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    data TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS job_events_job_seq ON job_events (job_id, seq);
+"""
+
+# Columns added after the first release, created on existing job tables at startup
+_MIGRATIONS = {
+    "owner_host": "ALTER TABLE jobs ADD COLUMN owner_host TEXT",
+    "owner_pid": "ALTER TABLE jobs ADD COLUMN owner_pid INTEGER",
+    "owner_token": "ALTER TABLE jobs ADD COLUMN owner_token TEXT",
+}
+
+
+@dataclass
+# Job: one row of the job table
+class Job:
+    id: str
+    filename: str
+    path: str
+    content_hash: str
+    status: str
+    stage: Optional[str]
+    frames_decoded: int
+    attempts: int
+    cached: bool
+    result: Optional[Dict[str, Any]]
+    error: Optional[str]
+    created_at: float
+    updated_at: float
+    finished_at: Optional[float]
+    # Server process that claimed the running attempt (see OWNER_HOST)
+    owner_host: Optional[str] = None
+    owner_pid: Optional[int] = None
+    owner_token: Optional[str] = None
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> "Job":
+        data = dict(row)
+        data["cached"] = bool(data["cached"])
+        data["result"] = json.loads(data["result"]) if data["result"] else None
+        return cls(**data)
+
+
+class JobStore:
+    # Persistent job table in SQLite (WAL mode), safe to share across threads and processes
+    # Every call opens its own short-lived connection
+
+    def __init__(self, db_path: str | Path = JOBS_DB_PATH):
+        self.db_path = str(db_path)
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column, statement in _MIGRATIONS.items():
+                if column not in columns:
+                    try:
+                        conn.execute(statement)
+                    except sqlite3.OperationalError:
+                        # Added concurrently by another process
+                        pass
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def create(
+        self,
+        job_id: str,
+        filename: str,
+        path: str | Path,
+        content_hash: str,
+        result: Optional[Dict[str, Any]] = None,
+    ) -> Job:
+        # Insert a queued job, or an already finished one when a cached result is given
+        now = time.time()
+        with self._connect() as conn:
+            if result is None:
+                conn.execute(
+                    "INSERT INTO jobs (id, filename, path, content_hash, status, stage, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, 'queued', 'queued', ?, ?)",
+                    (job_id, filename, str(path), content_hash, now, now),
+                )
+            else:
+                conn.execute(
+                    "INSERT INTO jobs (id, filename, path, content_hash, status, stage, frames_decoded, cached, "
+                    "result, created_at, updated_at, finished_at) VALUES (?, ?, ?, ?, 'done', 'done', ?, 1, ?, ?, ?, ?)",
+                    (job_id, filename, str(path), content_hash, int(result.get("frame_count", 0)),
+                     json.dumps(result), now, now, now),
+                )
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return Job.from_row(row) if row else None
+
+    def claim_next(self) -> Optional[Job]:
+        # Atomically move the oldest queued job to running (one claimant across processes),
+        # owned by this server process. The new attempts count identifies the attempt
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+                ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', stage = 'starting', attempts = attempts + 1, "
+                    "updated_at = ?, owner_host = ?, owner_pid = ?, owner_token = ? WHERE id = ?",
+                    (time.time(), OWNER_HOST, os.getpid(), OWNER_TOKEN, row["id"]),
+                )
+                # A retried job streams its new attempt from the start
+                conn.execute("DELETE FROM job_events WHERE job_id = ?", (row["id"],))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return self.get(row["id"])
+
+    def record_event(self, job_id: str, stage: str, data: Dict[str, Any], attempt: Optional[int] = None) -> None:
+        # Append a progress event and update the job's stage; doubles as the running
+        # job's heartbeat (updated_at). Ignored once the job is no longer running, or
+        # no longer running this attempt when one is given
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                updated = conn.execute(
+                    "UPDATE jobs SET stage = ?, frames_decoded = COALESCE(?, frames_decoded), updated_at = ? "
+                    "WHERE id = ? AND status = 'running' AND attempts = COALESCE(?, attempts)",
+                    (stage, data.get("framesDecoded"), now, job_id, attempt),
+                ).rowcount
+                if updated:
+                    conn.execute(
+                        "INSERT INTO job_events (job_id, stage, data, created_at) VALUES (?, ?, ?, ?)",
+                        (job_id, stage, json.dumps(data), now),
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def events(self, job_id: str, after_seq: int = 0) -> List[Dict[str, Any]]:
+        # Progress events of a job newer than after_seq, oldest first
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT seq, stage, data, created_at FROM job_events WHERE job_id = ? AND seq > ? ORDER BY seq",
+                (job_id, after_seq),
+            ).fetchall()
+        return [
+            {"seq": row["seq"], "stage": row["stage"], "data": json.loads(row["data"]), "createdAt": row["created_at"]}
+            for row in rows
+        ]
+
+    def complete(self, job_id: str, result: Dict[str, Any], cached: bool, attempt: Optional[int] = None) -> bool:
+        # Finish the job; with an attempt, only while that attempt still runs it. True if stored
+        now = time.time()
+        with self._connect() as conn:
+            return conn.execute(
+                "UPDATE jobs SET status = 'done', stage = 'done', result = ?, cached = ?, error = NULL, "
+                "frames_decoded = MAX(frames_decoded, ?), updated_at = ?, finished_at = ? "
+                "WHERE id = ? AND (? IS NULL OR (status = 'running' AND attempts = ?))",
+                (json.dumps(result), int(cached), int(result.get("frame_count", 0)), now, now,
+                 job_id, attempt, attempt),
+            ).rowcount > 0
+
+    def fail(self, job_id: str, error: str, attempt: Optional[int] = None) -> bool:
+        # Same attempt rule as complete()
+        now = time.time()
+        with self._connect() as conn:
+            return conn.execute(
+                "UPDATE jobs SET status = 'failed', stage = 'failed', error = ?, updated_at = ?, finished_at = ? "
+                "WHERE id = ? AND (? IS NULL OR (status = 'running' AND attempts = ?))",
+                (error, now, now, job_id, attempt, attempt),
+            ).rowcount > 0
+
+    @staticmethod
+    def _recover(conn: sqlite3.Connection, rows: List[sqlite3.Row], max_attempts: int) -> Dict[str, int]:
+        # Requeue interrupted running rows, or fail those that have used max_attempts
+        # (caller holds the write transaction). Returns the counts per new status
+        now = time.time()
+        failed = [(now, now, row["id"]) for row in rows if row["attempts"] >= max_attempts]
+        requeued = [(now, row["id"]) for row in rows if row["attempts"] < max_attempts]
+        conn.executemany(
+            "UPDATE jobs SET status = 'failed', stage = 'failed', "
+            "error = 'Analysis was interrupted too many times', finished_at = ?, updated_at = ? "
+            "WHERE id = ?",
+            failed,
+        )
+        conn.executemany(
+            "UPDATE jobs SET status = 'queued', stage = 'queued', updated_at = ?, "
+            "owner_host = NULL, owner_pid = NULL, owner_token = NULL WHERE id = ?",
+            requeued,
+        )
+        return {"queued": len(requeued), "failed": len(failed)}
+
+    def requeue_stale(
+        self,
+        stale_seconds: float = JOB_STALE_SECONDS,
+        max_attempts: int = JOB_MAX_ATTEMPTS,
+        running_here: Optional[Collection[str]] = None,
+    ) -> int:
+        # Running jobs whose server process is gone go back to the queue, or fail once they
+        # have used max_attempts. Owners on this machine are checked directly, so jobs of a
+        # crashed or restarted process recover at once and a slow job of a live process is
+        # never taken away; jobs claimed elsewhere recover after stale_seconds without a heartbeat.
+        # running_here: ids of the jobs this process is still running; its other claims are
+        # recovered too (their pool worker died without reporting back)
+        cutoff = time.time() - stale_seconds
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = conn.execute(
+                    "SELECT id, attempts, updated_at, owner_host, owner_pid, owner_token FROM jobs "
+                    "WHERE status = 'running'"
+                ).fetchall()
+                orphaned = []
+                for row in rows:
+                    owner = (row["owner_host"], row["owner_pid"], row["owner_token"])
+                    if running_here is not None and _claimed_here(*owner):
+                        if row["id"] not in running_here:
+                            orphaned.append(row)
+                        continue
+                    alive = _owner_alive(*owner)
+                    if alive is False or (alive is None and row["updated_at"] < cutoff):
+                        orphaned.append(row)
+                recovered = self._recover(conn, orphaned, max_attempts)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        if orphaned:
+            logger.warning(
+                f"Recovered interrupted jobs: {recovered['queued']} requeued, {recovered['failed']} failed"
+            )
+        return recovered["queued"]
+
+    def release(
+        self, job_id: str, attempt: int, started: bool = True, max_attempts: int = JOB_MAX_ATTEMPTS
+    ) -> Optional[str]:
+        # Give back a claimed attempt that ended without an outcome (its worker died, or it was
+        # cancelled): requeued, or failed once max_attempts were used. An attempt that never
+        # started does not count. Returns the job's new status, None if the attempt no longer owns it
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT id, attempts FROM jobs WHERE id = ? AND status = 'running' AND attempts = ?",
+                    (job_id, attempt),
+                ).fetchone()
+                status = None
+                if row is not None:
+                    if not started:
+                        conn.execute("UPDATE jobs SET attempts = attempts - 1 WHERE id = ?", (job_id,))
+                        row = {"id": row["id"], "attempts": row["attempts"] - 1}
+                    recovered = self._recover(conn, [row], max_attempts)
+                    status = "queued" if recovered["queued"] else "failed"
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return status
+
+    def purge(self, older_than_seconds: float) -> int:
+        # Delete finished jobs (and any leftover uploads) older than the retention window
+        cutoff = time.time() - older_than_seconds
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, path FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?", (cutoff,)
+            ).fetchall()
+            for row in rows:
+                Path(row["path"]).unlink(missing_ok=True)
+            ids = [(row["id"],) for row in rows]
+            conn.executemany("DELETE FROM job_events WHERE job_id = ?", ids)
+            conn.executemany("DELETE FROM jobs WHERE id = ?", ids)
+        return len(rows)
+
+    def counts(self) -> Dict[str, int]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        counts = {status: 0 for status in JOB_STATUSES}
+        counts.update({row["status"]: row["n"] for row in rows})
+        return counts
+
+
+class JobProgress:
+    # analyze_video progress callback that records events on the job for streaming
+    # Per-frame events are throttled to one per interval; every other event is recorded
+
+    def __init__(self, store: JobStore, job_id: str, attempt: int, interval: float = JOB_PROGRESS_INTERVAL):
+        self.store = store
+        self.job_id = job_id
+        self.attempt = attempt
+        self.interval = interval
+        self._last_frames = 0.0
+
+    def __call__(self, stage: str, data: Dict[str, Any]) -> None:
+        if stage == "frames":
+            now = time.monotonic()
+            if now - self._last_frames < self.interval:
+                return
+            self._last_frames = now
+        try:
+            self.store.record_event(self.job_id, stage, data, self.attempt)
+        except sqlite3.Error as e:
+            logger.warning(f"Could not record progress for job {self.job_id}: {e}")
+
+
+def run_job(job_id: str, db_path: str, attempt: int) -> None:
+    # Execute one claimed attempt of a job; runs on the analysis pool (thread or process).
+    # If the job was requeued meanwhile, the attempt's progress, outcome and the upload's
+    # deletion are all skipped: they belong to the attempt that now owns the job
+    from app.services.result_cache import result_cache
+    from app.services.video_analysis import analyze_video
+
+    store = JobStore(db_path)
+    job = store.get(job_id)
+    if job is None or job.status != "running" or job.attempts != attempt:
+        return
+    finished = False
+    try:
+        result = result_cache.get(job.content_hash)
+        cached = result is not None
+        if result is None:
+            result = analyze_video(job.path, progress=JobProgress(store, job_id, attempt))
+            result_cache.put(job.content_hash, result)
+        finished = store.complete(job_id, asdict(result), cached, attempt)
+        if finished:
+            logger.info(f"Job {job_id} done: file={job.filename}, confidence={result.confidence}, cached={cached}")
+    except (VideoProcessingError, NoFramesExtractedError) as e:
+        logger.warning(f"Job {job_id} video processing error: {e}")
+        finished = store.fail(job_id, f"Invalid video: {e}", attempt)
+    except Exception as e:
+        logger.exception(f"Job {job_id} failed: {e}")
+        finished = store.fail(job_id, "An unexpected error occurred during analysis. Please try again.", attempt)
+    finally:
+        if finished:
+            Path(job.path).unlink(missing_ok=True)
+        else:
+            logger.warning(f"Job {job_id} attempt {attempt} was superseded; its outcome is discarded")
+
+
+class JobRunner:
+    # Dispatcher thread: claims queued jobs and runs at most max_concurrent of them at once
+    # on the analysis executor. Polls the table too, so jobs queued by other server
+    # processes (or left over from before a restart) are picked up
+
+    def __init__(
+        self,
+        store: JobStore,
+        max_concurrent: int = JOB_WORKERS,
+        poll_interval: float = 1.0,
+        maintenance_interval: float = 60.0,
+    ):
+        self.store = store
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.poll_interval = poll_interval
+        self.maintenance_interval = maintenance_interval
+        self._executor: Any = None
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        # Job id -> attempt of the jobs this runner has on the executor
+        self._running: Dict[str, int] = {}
+        self._stopped = True
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, executor: Any) -> None:
+        with self._cond:
+            if not self._stopped:
+                return
+            self._executor = executor
+            self._stopped = False
+        self._thread = threading.Thread(target=self._loop, name="job-runner", daemon=True)
+        self._thread.start()
+
+    def notify(self) -> None:
+        # Wake the dispatcher after a job was queued
+        with self._cond:
+            self._cond.notify()
+
+    def _on_done(self, job: Job, future: Future) -> None:
+        # run_job records every analysis outcome itself; a future that still raised (a dead
+        # pool worker: BrokenProcessPool) or was cancelled (shutdown) hands the job back
+        error = None if future.cancelled() else future.exception()
+        try:
+            if future.cancelled() or error is not None:
+                status = self.store.release(job.id, job.attempts, started=not future.cancelled())
+                if status is not None:
+                    reason = "cancelled" if future.cancelled() else repr(error)
+                    logger.warning(f"Job {job.id} attempt {job.attempts} did not finish ({reason}): {status}")
+        except Exception as e:
+            logger.error(f"Could not release job {job.id}: {e}")
+        finally:
+            with self._cond:
+                self._in_flight -= 1
+                self._running.pop(job.id, None)
+                self._cond.notify()
+
+    def _dispatch(self) -> None:
+        while True:
+            with self._cond:
+                if self._stopped or self._in_flight >= self.max_concurrent:
+                    return
+            job = self.store.claim_next()
+            if job is None:
+                return
+            with self._cond:
+                self._in_flight += 1
+                self._running[job.id] = job.attempts
+            try:
+                future = self._executor.submit(run_job, job.id, self.store.db_path, job.attempts)
+            except Exception as e:
+                with self._cond:
+                    self._in_flight -= 1
+                    self._running.pop(job.id, None)
+                logger.error(f"Could not start job {job.id}: {e}")
+                self.store.fail(job.id, "Could not start analysis", job.attempts)
+                continue
+            future.add_done_callback(partial(self._on_done, job))
+
+    def _maintain(self) -> None:
+        # First pass runs at start-up, before anything is dispatched: jobs of a previous
+        # server process on this machine are requeued at once. Claims of this process that
+        # are no longer on the executor are recovered as well
+        with self._cond:
+            running = set(self._running)
+        self.store.requeue_stale(running_here=running)
+        purged = self.store.purge(JOB_RETENTION_HOURS * 3600)
+        if purged:
+            logger.info(f"Purged {purged} finished jobs")
+
+    def _loop(self) -> None:
+        last_maintenance: Optional[float] = None
+        while True:
+            try:
+                if last_maintenance is None or time.monotonic() - last_maintenance >= self.maintenance_interval:
+                    self._maintain()
+                    last_maintenance = time.monotonic()
+                self._dispatch()
+            except Exception as e:
+                logger.error(f"Job dispatcher error: {e}")
+            with self._cond:
+                if self._stopped:
+                    return
+                self._cond.wait(self.poll_interval)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            in_flight = self._in_flight
+        return {"maxConcurrent": self.max_concurrent, "inFlight": in_flight, "counts": self.store.counts()}
+
+    def stop(self) -> None:
+        # Stop dispatching; jobs already running finish (or are recovered after a restart)
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+
+# Shared job store and dispatcher used by the API
+job_store = JobStore()
+job_runner = JobRunner(job_store)
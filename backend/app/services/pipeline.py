@@ -0,0 +1,160 @@
+# Streaming frame pipeline: frames flow through per-frame stages into scalar reducers
+from __future__ import annotations
+
+import logging
+import math
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from app.utils.preprocessing import frame_to_grayscale, frame_to_hsv, frame_to_rgb
+
+logger = logging.getLogger(__name__)
+
+
+class RunningStats:
+    # Welford accumulator for count/mean/population std without keeping samples
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+    @property
+    def std(self) -> float:
+        # Population standard deviation (matches np.std default ddof=0)
+        if self.count == 0:
+            return 0.0
+        return math.sqrt(max(self._m2, 0.0) / self.count)
+
+
+class FrameView:
+    # One BGR frame plus lazily computed, memoised derived representations
+    # Every stage shares the same view so each colour conversion happens at most once
+
+    __slots__ = ("bgr", "faces", "region", "dropped", "_gray", "_hsv", "_rgb", "_resized")
+
+    def __init__(self, bgr: np.ndarray):
+        self.bgr = bgr
+        # Face boxes [K, 4] (x, y, w, h) and the region-of-interest view, set by face stages
+        self.faces: Optional[np.ndarray] = None
+        self.region: Optional["FrameView"] = None
+        # Set by a stage to keep the frame from the stages after it (see FrameStage.sees_dropped)
+        self.dropped = False
+        self._gray: Optional[np.ndarray] = None
+        self._hsv: Optional[np.ndarray] = None
+        self._rgb: Optional[np.ndarray] = None
+        self._resized: Dict[Tuple[int, int], np.ndarray] = {}
+
+    @property
+    def gray(self) -> np.ndarray:
+        if self._gray is None:
+            self._gray = frame_to_grayscale(self.bgr)
+        return self._gray
+
+    @property
+    def hsv(self) -> np.ndarray:
+        if self._hsv is None:
+            self._hsv = frame_to_hsv(self.bgr)
+        return self._hsv
+
+    @property
+    def rgb(self) -> np.ndarray:
+        if self._rgb is None:
+            self._rgb = frame_to_rgb(self.bgr)
+        return self._rgb
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return self.bgr.shape
+
+    def resized(self, width: int, height: int) -> np.ndarray:
+        # BGR frame resized to (width, height), memoised per size
+        key = (width, height)
+        out = self._resized.get(key)
+        if out is None:
+            out = cv2.resize(self.bgr, key)
+            self._resized[key] = out
+        return out
+
+    @property
+    def target(self) -> "FrameView":
+        # View analysis stages should read: the face region when one is set, else the frame
+        return self.region if self.region is not None else self
+
+
+def crop_face_region(bgr: np.ndarray, box: np.ndarray, padding: float, size: int) -> np.ndarray:
+    # Square crop around a face box, padded by a fraction of the box side on every edge,
+    # shifted to stay inside the frame, then resized to size x size
+    h, w = bgr.shape[:2]
+    x, y, bw, bh = (int(v) for v in box[:4])
+    side = int(round(max(bw, bh) * (1.0 + 2.0 * padding)))
+    side = max(1, min(side, h, w))
+    cx, cy = x + bw // 2, y + bh // 2
+    x0 = min(max(0, cx - side // 2), w - side)
+    y0 = min(max(0, cy - side // 2), h - side)
+    crop = bgr[y0:y0 + side, x0:x0 + side]
+    return cv2.resize(crop, (size, size), interpolation=cv2.INTER_AREA if side > size else cv2.INTER_LINEAR)
+
+
+class FrameStage:
+    # One step of the pipeline: consumes each frame view, keeps only small state
+
+    name: str = "stage"
+    # Whether update() still runs for frames an earlier stage dropped
+    sees_dropped: bool = False
+
+    def update(self, view: FrameView) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        # End of stream: flush any buffered work
+        pass
+
+
+class FramePipeline:
+    # Drives a frame iterator through every stage once; frames are dropped after use
+    # so peak memory is independent of the number of frames
+
+    def __init__(self, stages: List[FrameStage]):
+        self.stages = stages
+        self.frame_count = 0
+
+    def run(self, frames: Iterable[np.ndarray]) -> int:
+        # Every stage is closed and the frame source released even if decoding or a
+        # stage fails; on failure close errors are logged so the original error propagates
+        completed = False
+        try:
+            for frame in frames:
+                view = FrameView(frame)
+                for stage in self.stages:
+                    if not view.dropped or stage.sees_dropped:
+                        stage.update(view)
+                self.frame_count += 1
+            completed = True
+        finally:
+            close_frames = getattr(frames, "close", None)
+            if close_frames is not None:
+                close_frames()
+            self._close_stages(raise_errors=completed)
+        return self.frame_count
+
+    def _close_stages(self, raise_errors: bool) -> None:
+        error: Optional[Exception] = None
+        for stage in self.stages:
+            try:
+                stage.close()
+            except Exception as e:
+                if not raise_errors:
+                    logger.warning(f"Stage '{stage.name}' failed to close: {e}")
+                elif error is None:
+                    error = e
+        if error is not None:
+            raise error
@@ -0,0 +1,232 @@
+# Content-addressed cache of analysis results for repeat uploads
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from app import constants
+from app.config import (
+    ANALYSIS_REGION,
+    DETECTOR_BACKEND,
+    FACE_DETECTOR_BACKEND,
+    FACE_DETECTOR_MODEL_PATH,
+    FRAME_SAMPLING_MODE,
+    FRAMES_PER_SECOND_SAMPLED,
+    FREQUENCY_ANALYSIS_SIZE,
+    MAX_FRAMES,
+    MODEL_OPTIMIZE,
+    MODEL_QUANTIZATION_REFERENCE_VIDEO,
+    RESULT_CACHE_DIR,
+    RESULT_CACHE_MAX_MB,
+    RESULT_CACHE_SIZE,
+)
+from app.models.backends import detector_model_path
+from app.services.video_analysis import AnalysisResult
+from app.utils.hashing import sha256_file
+
+logger = logging.getLogger(__name__)
+
+
+def analysis_fingerprint() -> str:
+    # Fingerprint of everything that changes the analysis output for identical bytes:
+    # sampling config, detection constants and the model file hashes
+    weights_path = detector_model_path()
+    weights_hash = ""
+    if weights_path and Path(weights_path).exists():
+        weights_hash = sha256_file(weights_path)
+
+    # A face detector model file (YuNet) counts by content, like the detector weights
+    face_model_hash = ""
+    if FACE_DETECTOR_MODEL_PATH and Path(FACE_DETECTOR_MODEL_PATH).exists():
+        face_model_hash = sha256_file(FACE_DETECTOR_MODEL_PATH)
+
+    public_constants = {
+        name: getattr(constants, name)
+        for name in sorted(dir(constants))
+        if name.isupper()
+    }
+    payload = {
+        "frames_per_second_sampled": FRAMES_PER_SECOND_SAMPLED,
+        "max_frames": MAX_FRAMES,
+        "frame_sampling_mode": FRAME_SAMPLING_MODE,
+        "frequency_analysis_size": FREQUENCY_ANALYSIS_SIZE,
+        "analysis_region": ANALYSIS_REGION,
+        "face_detector_backend": FACE_DETECTOR_BACKEND,
+        "face_detector_model_path": FACE_DETECTOR_MODEL_PATH,
+        "face_detector_model_sha256": face_model_hash,
+        "detector_backend": DETECTOR_BACKEND,
+        "model_optimize": MODEL_OPTIMIZE,
+        "quantization_reference_video": MODEL_QUANTIZATION_REFERENCE_VIDEO,
+        "constants": public_constants,
+        "weights_sha256": weights_hash,
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def is_cacheable(result: AnalysisResult) -> bool:
+    # A heuristic-only result while detector weights are configured means the model failed to
+    # load or run; caching it would keep serving the fallback after the model recovers
+    if result.detection_method != "heuristic":
+        return True
+    weights_path = detector_model_path()
+    return not (weights_path and Path(weights_path).exists())
+
+
+class ResultCache:
+    # Two-tier cache: in-memory LRU plus optional on-disk JSON tier with size-based eviction
+
+    def __init__(
+        self,
+        max_entries: int = RESULT_CACHE_SIZE,
+        disk_dir: str | Path | None = RESULT_CACHE_DIR or None,
+        disk_max_bytes: int = RESULT_CACHE_MAX_MB * 1024 * 1024,
+    ):
+        self.max_entries = max(0, int(max_entries))
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_max_bytes = disk_max_bytes
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._skipped = 0
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    @staticmethod
+    def make_key(content_hash: str) -> str:
+        # Combine upload hash with the current analysis config fingerprint
+        return hashlib.sha256(f"{content_hash}:{analysis_fingerprint()}".encode()).hexdigest()
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / key[:2] / f"{key}.json"
+
+    def _remember(self, key: str, data: Dict[str, Any]) -> None:
+        # Insert into memory tier, evicting least recently used entries (caller holds lock)
+        self._memory[key] = data
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    @staticmethod
+    def _served(data: Dict[str, Any], started: float) -> AnalysisResult:
+        # Cached result whose processing time is this lookup's, not the original analysis'
+        return AnalysisResult(**{**data, "processing_time_seconds": round(time.perf_counter() - started, 2)})
+
+    def get(self, content_hash: str) -> Optional[AnalysisResult]:
+        # Look up a cached result for the upload hash, None on miss
+        if not self.enabled:
+            return None
+        started = time.perf_counter()
+        key = self.make_key(content_hash)
+
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self._hits += 1
+                return self._served(data, started)
+
+        data = self._read_disk(key)
+        with self._lock:
+            if data is None:
+                self._misses += 1
+                return None
+            self._disk_hits += 1
+            self._remember(key, data)
+        return self._served(data, started)
+
+    def put(self, content_hash: str, result: AnalysisResult) -> None:
+        # Store result in memory and (if configured) on disk; model-fallback results are not stored
+        if not self.enabled:
+            return
+        if not is_cacheable(result):
+            with self._lock:
+                self._skipped += 1
+            logger.info("Not caching heuristic fallback result (detector model did not score the video)")
+            return
+        key = self.make_key(content_hash)
+        data = asdict(result)
+        with self._lock:
+            self._remember(key, data)
+        self._write_disk(key, data)
+
+    def _read_disk(self, key: str) -> Optional[Dict[str, Any]]:
+        if self.disk_dir is None:
+            return None
+        path = self._disk_path(key)
+        try:
+            data = json.loads(path.read_text())
+            # Touch so eviction order follows last use
+            os.utime(path)
+            return data
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Discarding unreadable result cache entry {path.name}: {e}")
+            path.unlink(missing_ok=True)
+            return None
+
+    def _write_disk(self, key: str, data: Dict[str, Any]) -> None:
+        if self.disk_dir is None:
+            return
+        path = self._disk_path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_text(json.dumps(data))
+            # Atomic rename so readers never see a partial entry
+            tmp.replace(path)
+            self._evict_disk()
+        except OSError as e:
+            logger.warning(f"Could not write result cache entry: {e}")
+
+    def _evict_disk(self) -> None:
+        # Delete least recently used files until the disk tier fits in disk_max_bytes
+        entries = []
+        total = 0
+        for path in self.disk_dir.glob("*/*.json"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+        if total <= self.disk_max_bytes:
+            return
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.disk_max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._memory),
+                "maxEntries": self.max_entries,
+                "hits": self._hits,
+                "diskHits": self._disk_hits,
+                "misses": self._misses,
+                "skipped": self._skipped,
+                "diskEnabled": self.disk_dir is not None,
+            }
+
+
+# Shared cache used by the API routes
+result_cache = ResultCache()
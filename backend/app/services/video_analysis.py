@@ -3,14 +3,22 @@ from __future__ import annotations
 
 import logging
 import time
+from collections import deque
+from concurrent.futures import Future
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import cv2
 import numpy as np
 
-from app.config import FRAMES_PER_SECOND_SAMPLED, MAX_FRAMES, MODEL_WEIGHTS_PATH
+from app.config import (
+    ANALYSIS_REGION,
+    FRAMES_PER_SECOND_SAMPLED,
+    FRAME_SAMPLING_MODE,
+    FREQUENCY_ANALYSIS_SIZE,
+    MAX_FRAMES,
+)
 from app.constants import (
     HEURISTIC_WEIGHT_SHARPNESS,
     HEURISTIC_WEIGHT_COMPRESSION,
@@ -27,13 +35,31 @@ from app.constants import (
     HISTOGRAM_BINS_H,
     HISTOGRAM_BINS_S,
     LOG_FRAME_DETAILS,
+    FACE_PROBE_FRAMES,
+    FACE_ROI_PADDING,
+    FACE_ROI_SIZE,
+    FREQUENCY_BATCH_SIZE,
+    INFERENCE_BATCH_SIZE,
+    MODEL_INPUT_HEIGHT,
+    MODEL_INPUT_WIDTH,
 )
 from app.exceptions import VideoProcessingError, NoFramesExtractedError
-from app.utils.video_utils import extract_frames as util_extract_frames
+from app.models.backends import DetectorBackend, detector_model_path
+from app.services.batching import inference_batcher
+from app.services.face_tracking import FaceTracker
+from app.services.pipeline import FramePipeline, FrameStage, FrameView, RunningStats, crop_face_region
+from app.utils.artifacts import block_artifact_ratios
+from app.utils.face_detection import FaceDetector, get_face_detector
+from app.utils.frequency import FrequencyAnalyzer
+from app.utils.video_utils import iter_frames as util_iter_frames
 from app.utils.metrics import ensemble_score, get_risk_level
+from app.utils.preprocessing import frames_to_blob
 
 logger = logging.getLogger(__name__)
 
+# Shared batched FFT engine (band masks cached per frame shape)
+_frequency_analyzer = FrequencyAnalyzer(FREQUENCY_ANALYSIS_SIZE)
+
 
 @dataclass
 # AnalysisResult: encapsulates final analysis outputs
@@ -47,16 +73,14 @@ class AnalysisResult:
     details: Optional[Dict[str, float]] = None
 
 
-def _laplacian_variance(frame: np.ndarray) -> float:
-    # Compute Laplacian variance as a sharpness metric for a frame
-    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+def _laplacian_variance(gray: np.ndarray) -> float:
+    # Compute Laplacian variance of a grayscale frame as a sharpness metric
     laplacian = cv2.Laplacian(gray, cv2.CV_64F)
     return float(laplacian.var())
 
 
-def _color_histogram_entropy(frame: np.ndarray) -> float:
+def _color_histogram_entropy(hsv: np.ndarray) -> float:
     # Compute Shannon entropy of 2D HSV color histogram
-    hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
     # Use histogram bins from constants
     hist = cv2.calcHist([hsv], [0, 1], None, [HISTOGRAM_BINS_H, HISTOGRAM_BINS_S], [0, 180, 0, 256])
 
@@ -70,176 +94,242 @@ def _color_histogram_entropy(frame: np.ndarray) -> float:
     return float(-np.sum(hist * np.log2(hist)))
 
 
-def _temporal_difference(frames: List[np.ndarray]) -> np.ndarray:
-    # Compute mean pixel differences between consecutive frames
-    if len(frames) < 2:
-        return np.array([0.0])
-
-    diffs = []
-    for i in range(len(frames) - 1):
-        # Convert to grayscale for motion detection
-        # Color doesn't matter for motion measurement
-        g1 = cv2.cvtColor(frames[i], cv2.COLOR_BGR2GRAY)
-        g2 = cv2.cvtColor(frames[i + 1], cv2.COLOR_BGR2GRAY)
-
-        # Compute absolute pixel-wise differences
-        diff = np.abs(g1.astype(np.float32) - g2.astype(np.float32))
-
-        # Average across the frame to get single motion magnitude value
-        diffs.append(float(np.mean(diff)))
-
-    return np.array(diffs)
-
-
-def _compression_artifacts_score(frames: List[np.ndarray]) -> float:
-    # Detect block-like compression artifacts across frames
-    if not frames:
-        return 0.0
-
-    artifact_scores = []
-    block_size = 8  # Standard codec block size
-
-    for frame in frames:
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-
-        # Compute gradient magnitude (edge strength)
-        sobelx = cv2.Sobel(gray, cv2.CV_64F, 1, 0, ksize=3)
-        sobely = cv2.Sobel(gray, cv2.CV_64F, 0, 1, ksize=3)
-        gradient = np.sqrt(sobelx**2 + sobely**2)
-
-        # Sample edges at block boundaries to detect artificial block artifacts
-        h, w = gray.shape
-        boundary_edges = []
-
-        # Check horizontal boundaries (every block_size pixels)
-        for y in range(block_size, h, block_size):
-            # Sum edge magnitude at this boundary
-            boundary_edges.append(np.sum(gradient[y-1:y+1, :]))
-
-        # Check vertical boundaries
-        for x in range(block_size, w, block_size):
-            boundary_edges.append(np.sum(gradient[:, x-1:x+1]))
-
-        if boundary_edges:
-            # Higher boundary edges = more pronounced block artifacts
-            avg_boundary_edge = np.mean(boundary_edges)
-            avg_interior_edge = np.mean(gradient)  # Average edge everywhere
-
-            # Ratio of boundary to interior edges - if much higher, indicates blocks
-            if avg_interior_edge > 0:
-                artifact_ratio = min(1.0, avg_boundary_edge / avg_interior_edge)
-            else:
-                artifact_ratio = 0.0
-
-            artifact_scores.append(artifact_ratio)
-
-    # Average across frames
-    return float(np.mean(artifact_scores)) if artifact_scores else 0.0
-
-
-def _frequency_anomaly_score(frames: List[np.ndarray]) -> float:
-    # Detect frequency-domain anomalies using FFT-based heuristics
-    if not frames:
-        return 0.0
-
-    frequency_scores = []
-
-    for frame in frames:
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY).astype(np.float32)
-
-        # Compute FFT (frequency domain representation)
-        fft = np.fft.fft2(gray)
-        magnitude = np.abs(fft)
+def _temporal_difference(prev_gray: np.ndarray, gray: np.ndarray) -> float:
+    # Mean absolute pixel difference between two consecutive grayscale frames
+    # Color doesn't matter for motion measurement
+    diff = np.abs(prev_gray.astype(np.float32) - gray.astype(np.float32))
 
-        # Shift zero-frequency component to center
-        magnitude_shifted = np.fft.fftshift(magnitude)
+    # Average across the frame to get single motion magnitude value
+    return float(np.mean(diff))
 
-        # Log-scale for better visualization
-        magnitude_log = np.log(magnitude_shifted + 1)
 
-        # Split into low and high frequency bands
-        h, w = magnitude_log.shape
-        center_h, center_w = h // 2, w // 2
+# Progress callback: progress(stage, data), stage one of ANALYSIS_STAGES
+#   human_check  {humansDetected, framesScanned}                 once, after the probe frames
+#   frames       {framesDecoded, framesPlanned, partialScore}   one per decoded frame
+#   model_batch  {batch, batches, framesScored, partialModelScore}
+#   scoring      {framesDecoded}
+#   feature      {feature, score}                               one per heuristic feature
+#   done         {framesDecoded, confidence}
+ProgressCallback = Callable[[str, Dict[str, Any]], None]
 
-        # Low frequency (center region - contains most natural image energy)
-        low_freq_region = magnitude_log[
-            center_h - h//4:center_h + h//4,
-            center_w - w//4:center_w + w//4
-        ]
+ANALYSIS_STAGES = ("human_check", "frames", "model_batch", "scoring", "feature", "done")
 
-        # High frequency (edges - contains fine details)
-        high_freq_energy = magnitude_log.sum() - low_freq_region.sum()
-
-        # Natural images have most energy in low frequencies
-        # AI-generated images sometimes have abnormal high-frequency content
-        low_freq_energy = low_freq_region.sum()
-
-        if low_freq_energy > 0:
-            high_freq_ratio = high_freq_energy / (low_freq_energy + high_freq_energy)
-        else:
-            high_freq_ratio = 0.0
-
-        # Score: deviation from expected ratio (too much high-frequency = suspicious)
-        # Natural images: ~10-15% high frequency, AI images may deviate
-        natural_high_freq_ratio = 0.15
-        anomaly = abs(high_freq_ratio - natural_high_freq_ratio)
-        frequency_scores.append(min(1.0, anomaly * 5))  # Scale for sensitivity
-
-    return float(np.mean(frequency_scores)) if frequency_scores else 0.0
+# detailBreakdown keys reported as feature events, in scoring order
+PROGRESS_FEATURES = (
+    "sharpness_score",
+    "compression_score",
+    "optical_flow_score",
+    "frequency_score",
+    "entropy_score",
+    "model_score",
+)
 
 
-def _contains_human(frames: List[np.ndarray], required_faces: int = 1) -> bool:
-    # Quick face-presence check using OpenCV Haar cascade
-    # Library
-    try:
-        import cv2 as _cv2
-    except Exception:
-        return False
-
-    # Classifier
-    cascade_path = _cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
-    face_cascade = _cv2.CascadeClassifier(cascade_path)
-    if face_cascade.empty():
-        return False
-
-    # Scan frames
-    count = 0
-    for f in frames:
-        gray = _cv2.cvtColor(f, _cv2.COLOR_BGR2GRAY)
-        faces = face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(30, 30))
-        if len(faces) > 0:
-            count += len(faces)
-        if count >= required_faces:
-            return True
-
-    return False
-
-
-def heuristic_score(frames: List[np.ndarray]) -> Tuple[float, Dict[str, float]]:
-   
-    if not frames:
+def _no_progress(stage: str, data: Dict[str, Any]) -> None:
+    pass
+
+
+class ProgressStage(FrameStage):
+    # Reports frames decoded so far and the running heuristic score through the
+    # progress callback. Runs after the heuristic stage so it sees the current frame.
+    # The running score lags the final one slightly: frequency scores arrive per FFT batch
+
+    name = "progress"
+    # Counts every decoded frame, including those the face region stage drops
+    sees_dropped = True
+
+    def __init__(self, progress: ProgressCallback, heuristic: "HeuristicStage", metadata: Dict[str, Any]):
+        self.progress = progress
+        self.heuristic = heuristic
+        self.metadata = metadata
+        self.frames = 0
+
+    def update(self, view: FrameView) -> None:
+        self.frames += 1
+        partial = None
+        if self.heuristic.sharpness.count:
+            partial = round(_combine_heuristics(self.heuristic)[0], 4)
+        self.progress("frames", {
+            "framesDecoded": self.frames,
+            "framesPlanned": self.metadata.get("planned_frames"),
+            "partialScore": partial,
+        })
+
+
+class HumanProbe:
+    # Human check before the analysis pass: runs the face detector on up to probe_frames
+    # sample positions spread over the clip and stops at the first face. Spread frames are
+    # too far apart to track between, so each gets a full detection. A clip without a face
+    # in any probe frame is reported as no_human without decoding or analysing the rest;
+    # otherwise the probed frames are replayed into the analysis pass instead of decoded again
+
+    def __init__(self, detector: FaceDetector, probe_frames: int = FACE_PROBE_FRAMES):
+        self.detector = detector
+        self.probe_frames = max(1, probe_frames)
+        self.found = False
+        self.frames_scanned = 0
+        # Smallest face the detector can report at this video's resolution
+        self.min_face_side = 0
+        # Sample position -> probed frame, until replayed
+        self._frames: Dict[int, np.ndarray] = {}
+
+    @property
+    def positions(self) -> List[int]:
+        # Sample positions already decoded by the probe
+        return sorted(self._frames)
+
+    def scan(self, video_path: str | Path, sampling: Dict[str, Any]) -> bool:
+        metadata: Dict[str, Any] = {}
+        frames = util_iter_frames(video_path, **sampling, metadata=metadata, probe_frames=self.probe_frames)
+        try:
+            for frame in frames:
+                if not self.frames_scanned:
+                    self.min_face_side = self.detector.min_face_side(frame.shape)
+                self._frames[metadata["positions"][self.frames_scanned]] = frame
+                self.frames_scanned += 1
+                if len(self.detector.detect(frame)):
+                    self.found = True
+                    break
+        finally:
+            frames.close()
+        if not self.found:
+            self._frames = {}
+        return self.found
+
+    def replay(self, frames: Iterator[np.ndarray], metadata: Dict[str, Any]) -> Iterator[np.ndarray]:
+        # The analysis pass's frames (decoded with skip_positions=positions, filling metadata)
+        # with the probed frames put back in sample order
+        probed = deque(sorted(self._frames.items()))
+        self._frames = {}
+        try:
+            for i, frame in enumerate(frames):
+                position = metadata["positions"][i]
+                while probed and probed[0][0] < position:
+                    yield probed.popleft()[1]
+                yield frame
+            while probed:
+                yield probed.popleft()[1]
+        finally:
+            frames.close()
+
+
+class FaceTrackStage(FrameStage):
+    # Tracks faces across the decoded frames (detection on keyframes, template matching in
+    # between) and attaches the boxes to each view (view.faces)
+
+    name = "face_track"
+
+    def __init__(self, detector: FaceDetector):
+        self.tracker = FaceTracker(detector)
+        self.frames_with_faces = 0
+
+    def update(self, view: FrameView) -> None:
+        view.faces = self.tracker.update(view.bgr, view.gray)
+        if len(view.faces):
+            self.frames_with_faces += 1
+
+
+class FaceRegionStage(FrameStage):
+    # Attaches a fixed-size padded crop of the largest face as the view's region, so
+    # downstream stages only process face pixels. Boxes come from the face track stage
+    # (view.faces); frames without a detected or tracked face are dropped, so every
+    # analysed frame is a crop of a face in that frame, never a whole frame or a stale box
+
+    name = "face_region"
+
+    def __init__(self, size: int = FACE_ROI_SIZE, padding: float = FACE_ROI_PADDING):
+        self.size = size
+        self.padding = padding
+        self.frames_dropped = 0
+
+    def update(self, view: FrameView) -> None:
+        boxes = view.faces
+        if boxes is None or not len(boxes):
+            view.dropped = True
+            self.frames_dropped += 1
+            return
+        # Largest face by area
+        box = boxes[int(np.argmax(boxes[:, 2] * boxes[:, 3]))]
+        view.region = FrameView(crop_face_region(view.bgr, box, self.padding, self.size))
+
+
+class HeuristicStage(FrameStage):
+    # Per-frame heuristic features reduced to running statistics
+    # Only scalar accumulators and the previous grayscale frame are kept
+
+    name = "heuristic"
+
+    def __init__(self):
+        self.sharpness = RunningStats()
+        self.compression = RunningStats()
+        self.temporal = RunningStats()
+        self.frequency = RunningStats()
+        self.entropy = RunningStats()
+        self._prev_gray: Optional[np.ndarray] = None
+        # Grayscale frames waiting for the next batched FFT
+        self._frequency_batch: List[np.ndarray] = []
+
+    def update(self, view: FrameView) -> None:
+        # Features run on the face region when present, else the whole frame
+        view = view.target
+        # All grayscale features share the view's single BGR->gray conversion
+        gray = view.gray
+
+        # Feature 1: Sharpness (Laplacian variance)
+        self.sharpness.add(_laplacian_variance(gray))
+
+        # Feature 2: Compression artifacts
+        ratio = float(block_artifact_ratios(gray)[0])
+        if not np.isnan(ratio):
+            self.compression.add(ratio)
+
+        # Feature 3: Temporal difference against the previous frame
+        if self._prev_gray is not None:
+            self.temporal.add(_temporal_difference(self._prev_gray, gray))
+        self._prev_gray = gray
+
+        # Feature 4: Frequency domain anomalies (batched real FFT)
+        if self._frequency_batch and self._frequency_batch[0].shape != gray.shape:
+            self._flush_frequency()
+        self._frequency_batch.append(gray)
+        if len(self._frequency_batch) >= FREQUENCY_BATCH_SIZE:
+            self._flush_frequency()
+
+        # Feature 5: Color distribution entropy
+        self.entropy.add(_color_histogram_entropy(view.hsv))
+
+    def _flush_frequency(self) -> None:
+        if not self._frequency_batch:
+            return
+        for score in _frequency_analyzer.scores(np.stack(self._frequency_batch)):
+            self.frequency.add(float(score))
+        self._frequency_batch = []
+
+    def close(self) -> None:
+        self._flush_frequency()
+        self._prev_gray = None
+
+
+def _combine_heuristics(stage: HeuristicStage) -> Tuple[float, Dict[str, float]]:
+    # Turn accumulated feature statistics into the weighted heuristic score
+    if stage.sharpness.count == 0:
         raise ValueError("No frames provided for heuristic analysis")
 
-    if LOG_FRAME_DETAILS:
-        logger.debug(f"Computing heuristic score for {len(frames)} frames")
-
     # Feature 1: Sharpness consistency
-    # Extract sharpness for each frame
-    lap_vars = np.array([_laplacian_variance(f) for f in frames])
-    lap_std = float(np.std(lap_vars))
-    lap_mean = float(np.mean(lap_vars)) or 1e-6
+    lap_std = stage.sharpness.std
+    lap_mean = stage.sharpness.mean or 1e-6
     sharpness_consistency = lap_std / lap_mean  # normalized by mean
 
     # Convert to [0, 1] score: higher std/mean = more inconsistency = higher AI likelihood
     sharpness_score = min(1.0, sharpness_consistency / SHARPNESS_CONSISTENCY_DIVISOR)
 
-    # Feature 2: Compression artifacts
-    compression_score = _compression_artifacts_score(frames)
+    # Feature 2: Compression artifacts (averaged across frames)
+    compression_score = stage.compression.mean if stage.compression.count else 0.0
 
     # Feature 3: Optical flow consistency (temporal motion analysis)
-    temp_diffs = _temporal_difference(frames)
-    temp_mean = float(np.mean(temp_diffs))
-    temp_std = float(np.std(temp_diffs)) if len(temp_diffs) > 1 else 0.0
+    # A single frame has no pairs: treated as zero motion
+    temp_mean = stage.temporal.mean if stage.temporal.count else 0.0
+    temp_std = stage.temporal.std if stage.temporal.count > 1 else 0.0
 
     # Normalize temporal differences to [0, 1] range before using them.
     # Raw pixel differences can vary widely (0-255+ depending on content).
@@ -268,12 +358,11 @@ def heuristic_score(frames: List[np.ndarray]) -> Tuple[float, Dict[str, float]]:
     optical_flow_score += normalized_temp_std * 0.6
     optical_flow_score = min(1.0, optical_flow_score)
 
-    # Feature 4: Frequency domain anomalies
-    frequency_score = _frequency_anomaly_score(frames)
+    # Feature 4: Frequency domain anomalies (averaged across frames)
+    frequency_score = stage.frequency.mean
 
     # Feature 5: Color distribution entropy
-    entropies = np.array([_color_histogram_entropy(f) for f in frames])
-    entropy_std = float(np.std(entropies))
+    entropy_std = stage.entropy.std
     entropy_score = min(1.0, entropy_std / ENTROPY_STD_DIVISOR)
 
     # Weighted combination of all features
@@ -309,92 +398,219 @@ def heuristic_score(frames: List[np.ndarray]) -> Tuple[float, Dict[str, float]]:
     return final_score, details
 
 
-def _run_model_inference(frames: List[np.ndarray], model_path: str) -> float:
-    # Run pre-trained PyTorch model on frames, return score or -1.0 on failure
-    try:
-        import torch
-    except ImportError:
-        logger.warning("PyTorch not installed; cannot run model inference")
-        return -1.0
-
-    try:
-        from app.models.detector import load_detector, preprocess_frames
-
-        # Load model weights
-        model = load_detector(model_path)
-        if model is None:
-            logger.warning(f"Failed to load model from {model_path}")
-            return -1.0
-
-        # Preprocess frames for model input
-        tensor = preprocess_frames(frames)
-        if tensor is None:
-            logger.warning("Failed to preprocess frames for model")
+class ModelInferenceStage(FrameStage):
+    # Streams model-sized frames through the detector in micro-batches of batch_size
+    # Batch k runs on the shared inference batcher (possibly alongside other requests'
+    # frames) while the pipeline decodes and preprocesses batch k+1, so at most two
+    # batches are alive and probabilities are averaged as each batch finishes.
+    # Any failure disables the stage and score becomes -1.0
+
+    name = "model"
+
+    def __init__(
+        self,
+        model_path: str,
+        batch_size: int = INFERENCE_BATCH_SIZE,
+        on_batch: Optional[Callable[["ModelInferenceStage"], None]] = None,
+    ):
+        self.model_path = model_path
+        self.batch_size = max(1, batch_size)
+        # Called after each batch's probabilities are folded into the running score
+        self.on_batch = on_batch
+        self.batches = 0
+        self.failed = False
+        self._model = None
+        self._buffer: List[np.ndarray] = []
+        self._prob_sum = 0.0
+        self._prob_count = 0
+        self._pending: Optional[Future] = None
+
+    def update(self, view: FrameView) -> None:
+        if self.failed:
+            return
+        self._buffer.append(view.target.resized(MODEL_INPUT_WIDTH, MODEL_INPUT_HEIGHT))
+        if len(self._buffer) >= self.batch_size:
+            self._flush()
+
+    def _load(self) -> "DetectorBackend":
+        if self._model is None:
+            from app.models.registry import get_detector
+
+            # Fetch backend from the process-wide registry (loaded once per model file)
+            self._model = get_detector(self.model_path)
+            if self._model is None:
+                raise RuntimeError(f"Failed to load model from {self.model_path}")
+        return self._model
+
+    def _fail(self, error: Exception) -> None:
+        if isinstance(error, ImportError):
+            logger.warning(f"Inference backend not installed; cannot run model inference: {error}")
+        else:
+            logger.error(f"Error during model inference: {error}")
+        self.failed = True
+        self._buffer = []
+        self._pending = None
+
+    def _flush(self) -> None:
+        frames, self._buffer = self._buffer, []
+        if not frames or self.failed:
+            return
+        try:
+            model = self._load()
+            # Preprocess frames for model input (overlaps with the previous batch)
+            blob = frames_to_blob(frames, MODEL_INPUT_HEIGHT, MODEL_INPUT_WIDTH)
+            self._collect()
+            self._pending = inference_batcher.submit(model, blob)
+        except Exception as e:
+            self._fail(e)
+
+    def _collect(self) -> None:
+        # Wait for the in-flight batch and fold its probabilities into the running mean
+        if self._pending is None:
+            return
+        pending, self._pending = self._pending, None
+        probs = pending.result()
+        self._prob_sum += float(probs.sum())
+        self._prob_count += len(probs)
+        self.batches += 1
+        if self.on_batch is not None:
+            self.on_batch(self)
+
+    def close(self) -> None:
+        self._flush()
+        try:
+            self._collect()
+        except Exception as e:
+            self._fail(e)
+
+    @property
+    def frames_scored(self) -> int:
+        return self._prob_count
+
+    @property
+    def score(self) -> float:
+        # Average probability across frames, -1.0 if inference failed or saw no frames
+        if self.failed or self._prob_count == 0:
             return -1.0
+        return self._prob_sum / self._prob_count
 
-        # Move tensor to same device as model
-        device = next(model.parameters()).device
-        tensor = tensor.to(device)
-
-        # Run inference with no gradient computation (evaluation mode)
-        with torch.no_grad():
-            logits = model(tensor)
 
-            # Handle different output formats
-            if logits.shape[-1] == 1:
-                # Single output node - use sigmoid
-                probs = torch.sigmoid(logits).squeeze(-1)
-            else:
-                # Multi-class - use softmax and take positive class
-                probs = torch.softmax(logits, dim=1)[:, 1]
+def heuristic_score(frames: Iterable[np.ndarray]) -> Tuple[float, Dict[str, float]]:
+    # Compute the weighted heuristic score over a stream (or list) of BGR frames
+    stage = HeuristicStage()
+    FramePipeline([stage]).run(frames)
+    return _combine_heuristics(stage)
 
-            # Average probability across frames
-            return float(probs.mean().item())
 
-    except Exception as e:
-        logger.error(f"Error during model inference: {e}")
-        return -1.0
+def _run_model_inference(frames: Iterable[np.ndarray], model_path: str) -> float:
+    # Run pre-trained PyTorch model on frames, return score or -1.0 on failure
+    stage = ModelInferenceStage(model_path)
+    FramePipeline([stage]).run(frames)
+    return stage.score
+
+
+def _no_human_result(
+    frames_scanned: int,
+    start_time: float,
+    emit: ProgressCallback,
+    min_face_side: int = 0,
+) -> AnalysisResult:
+    details = {"humans_detected": 0}
+    if min_face_side:
+        # Faces smaller than this cannot be found at this resolution
+        details["min_face_size"] = min_face_side
+    processing_time = time.time() - start_time
+    emit("done", {"framesDecoded": frames_scanned, "confidence": 0.0})
+    return AnalysisResult(
+        is_ai_generated=False,
+        confidence=0.0,
+        detection_method="no_human",
+        frame_count=frames_scanned,
+        risk_level=get_risk_level(0.0),
+        processing_time_seconds=round(processing_time, 2),
+        details=details,
+    )
 
 
-def analyze_video(video_path: str | Path) -> AnalysisResult:
+def analyze_video(video_path: str | Path, progress: Optional[ProgressCallback] = None) -> AnalysisResult:
     # Main analysis pipeline: extract frames, heuristic, optional model, combine
+    # progress, if given, is called from the analysing thread as stages advance
     start_time = time.time()
+    emit = progress or _no_progress
 
     try:
-        # Step 1: Extract frames from video using utility function
-        frames, fps, total_frames = util_extract_frames(
-            video_path,
+        sampling = dict(
             frames_per_second=FRAMES_PER_SECOND_SAMPLED,
             max_frames=MAX_FRAMES,
+            sampling_mode=FRAME_SAMPLING_MODE,
         )
-        frame_count = len(frames)
-
-        logger.info(f"Starting analysis of {frame_count} frames from video")
-
-        # Human
-        has_human = _contains_human(frames)
-        if not has_human:
-            processing_time = time.time() - start_time
-            return AnalysisResult(
-                is_ai_generated=False,
-                confidence=0.0,
-                detection_method="no_human",
-                frame_count=frame_count,
-                risk_level=get_risk_level(0.0),
-                processing_time_seconds=round(processing_time, 2),
-                details={"humans_detected": 0},
-            )
-
-        # Step 2: Run heuristic detection (always available)
-        heuristic_confidence, heuristic_details = heuristic_score(frames)
-
-        # Step 3: Try to run model-based detection if available
-        model_path = (MODEL_WEIGHTS_PATH or "").strip()
+
+        detector = get_face_detector()
+        if detector is None:
+            # No face detector could be loaded: no frame can pass the human check
+            return _no_human_result(0, start_time, emit)
+
+        # Human check on a few spread frames, before the clip is decoded and analysed
+        probe = HumanProbe(detector)
+        probe.scan(video_path, sampling)
+        emit("human_check", {"humansDetected": probe.found, "framesScanned": probe.frames_scanned})
+        if not probe.found:
+            return _no_human_result(probe.frames_scanned, start_time, emit, probe.min_face_side)
+
+        model_path = detector_model_path()
+        use_model = bool(model_path) and Path(model_path).exists()
+
+        # Step 1 + 2: Stream frames through the heuristic (and model inference) stages
+        # Frames are dropped after each stage sees them, only reductions are kept
+        face_stage = FaceTrackStage(detector)
+        heuristic_stage = HeuristicStage()
+        stages: List[FrameStage] = [face_stage, heuristic_stage]
+        region_stage = None
+        if ANALYSIS_REGION == "face":
+            # Face crops go before the analysis stages so they see view.region
+            region_stage = FaceRegionStage()
+            stages.insert(1, region_stage)
+        # Filled with the sampling plan once the video is opened (for progress totals)
+        metadata: Dict[str, Any] = {}
+
+        def model_progress(stage: ModelInferenceStage) -> None:
+            planned = metadata.get("planned_frames") or stage.batch_size
+            emit("model_batch", {
+                "batch": stage.batches,
+                "batches": max(stage.batches, -(-planned // stage.batch_size)),
+                "framesScored": stage.frames_scored,
+                "partialModelScore": round(stage.score, 4),
+            })
+
+        model_stage = None
+        if use_model:
+            model_stage = ModelInferenceStage(model_path, on_batch=model_progress if progress else None)
+            stages.append(model_stage)
+        if progress is not None:
+            stages.append(ProgressStage(progress, heuristic_stage, metadata))
+
+        pipeline = FramePipeline(stages)
+        frames = util_iter_frames(video_path, **sampling, metadata=metadata, skip_positions=set(probe.positions))
+        frame_count = pipeline.run(probe.replay(frames, metadata))
+        if not heuristic_stage.sharpness.count:
+            # Face regions only: no decoded frame had a face to crop
+            return _no_human_result(frame_count, start_time, emit, probe.min_face_side)
+        logger.info(f"Analysed {heuristic_stage.sharpness.count} of {frame_count} decoded frames")
+
+        emit("scoring", {"framesDecoded": frame_count})
+        heuristic_confidence, heuristic_details = _combine_heuristics(heuristic_stage)
+        heuristic_details["face_frames"] = face_stage.frames_with_faces
+        heuristic_details.update(face_stage.tracker.summary())
+        if region_stage is not None:
+            # Frames without a detected or tracked face, not analysed
+            heuristic_details["face_skipped_frames"] = region_stage.frames_dropped
+
+        # Step 3: Use the streamed model score if inference ran
         model_confidence = -1.0
         detection_method = "heuristic"
 
-        if model_path and Path(model_path).exists():
-            model_confidence = _run_model_inference(frames, model_path)
+        if model_stage is not None:
+            model_confidence = model_stage.score
             if model_confidence >= 0:
                 # Model inference succeeded - use ensemble
                 final_confidence, detection_method = ensemble_score(
@@ -408,6 +624,10 @@ def analyze_video(video_path: str | Path) -> AnalysisResult:
             # No model available - use heuristic
             final_confidence = heuristic_confidence
 
+        for feature in PROGRESS_FEATURES:
+            if feature in heuristic_details:
+                emit("feature", {"feature": feature, "score": heuristic_details[feature]})
+
         # Step 4: Classify and determine risk level
         is_ai_generated = final_confidence >= CLASSIFICATION_THRESHOLD
         risk_level = get_risk_level(final_confidence)
@@ -420,6 +640,7 @@ def analyze_video(video_path: str | Path) -> AnalysisResult:
             f"confidence={final_confidence:.4f}, risk_level={risk_level}, "
             f"method={detection_method}, time={processing_time:.2f}s"
         )
+        emit("done", {"framesDecoded": frame_count, "confidence": round(final_confidence, 2)})
 
         return AnalysisResult(
             is_ai_generated=is_ai_generated,
@@ -0,0 +1,163 @@
+# Startup warmup: load models and run every analysis path once before taking traffic
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.constants import INFERENCE_BATCH_SIZE, MODEL_INPUT_HEIGHT, MODEL_INPUT_WIDTH
+
+logger = logging.getLogger(__name__)
+
+WARMUP_STATES = ("pending", "running", "ready", "failed")
+
+# How long readiness waits for every analysis worker process to warm up and report
+WORKER_WARMUP_TIMEOUT_SECONDS = 120.0
+
+
+def _synthetic_frames(count: int, height: int = 360, width: int = 640) -> List[np.ndarray]:
+    # Cheap BGR gradient frames; content does not matter, only shapes and code paths
+    yy, xx = np.mgrid[0:height, 0:width]
+    frames = []
+    for i in range(count):
+        frame = np.stack([(xx + 7 * i) % 256, (yy + 3 * i) % 256, (xx + yy) % 256], axis=-1)
+        frames.append(frame.astype(np.uint8))
+    return frames
+
+
+def _timed(steps: Dict[str, Any], name: str, fn) -> None:
+    # Run one warmup step, record its latency or error without aborting the others
+    start = time.perf_counter()
+    try:
+        detail = fn()
+        steps[name] = {"ok": True, "seconds": round(time.perf_counter() - start, 4)}
+        if detail:
+            steps[name].update(detail)
+    except Exception as e:
+        logger.warning(f"Warmup step '{name}' failed: {e}")
+        steps[name] = {"ok": False, "seconds": round(time.perf_counter() - start, 4), "error": str(e)}
+
+
+def warm_up() -> Dict[str, Any]:
+    # Warm the current process: OpenCV + heuristics, face detector, detector model
+    # Safe to call in analysis worker processes; returns per-step timings
+    from app.models.backends import detector_model_path
+    from app.services.video_analysis import heuristic_score
+    from app.utils.face_detection import get_face_detector
+    from app.utils.preprocessing import frames_to_blob
+
+    frames = _synthetic_frames(max(2, INFERENCE_BATCH_SIZE))
+    steps: Dict[str, Any] = {}
+
+    def heuristics():
+        # Colour conversions, Sobel, FFT and band masks for a typical frame shape
+        heuristic_score(frames)
+
+    _timed(steps, "heuristics", heuristics)
+
+    def face_detector():
+        detector = get_face_detector()
+        if detector is None:
+            raise RuntimeError("No face detector backend could be loaded")
+        detector.detect(frames[0])
+        return {"backend": detector.name}
+
+    _timed(steps, "faceDetector", face_detector)
+
+    model_path = detector_model_path()
+    if model_path and Path(model_path).exists():
+        def model():
+            from app.models.registry import get_detector
+
+            backend = get_detector(model_path)
+            if backend is None:
+                raise RuntimeError(f"Failed to load model from {model_path}")
+            # First forward pays for allocator and kernel selection
+            backend.predict(frames_to_blob(frames, MODEL_INPUT_HEIGHT, MODEL_INPUT_WIDTH))
+            return {"backend": backend.name}
+
+        _timed(steps, "model", model)
+    return steps
+
+
+def warm_worker(reports: Any = None) -> None:
+    # Process pool initializer: every worker warms itself before taking its first task and
+    # reports its steps to the parent (see AnalysisExecutor.start_workers)
+    steps = warm_up()
+    if reports is not None:
+        reports.put((f"pid{os.getpid()}", steps))
+
+
+class WarmupState:
+    # Tracks the startup warmup so /api/ready can gate traffic on it
+
+    def __init__(self):
+        self.status = "pending"
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.steps: Dict[str, Any] = {}
+        self.error: Optional[str] = None
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+
+    def run(self, executor: Any = None) -> None:
+        # Process pool: ready once every worker process has warmed itself in the pool
+        # initializer and reported back. Otherwise the analysis threads share this process's
+        # models and face detectors, so warming them once here covers all of them
+        with self._lock:
+            self.status = "running"
+            self.started_at = time.time()
+        try:
+            if executor is not None and executor.pool_type == "process":
+                steps = dict(executor.start_workers(WORKER_WARMUP_TIMEOUT_SECONDS))
+            else:
+                steps = warm_up()
+            status, error = "ready", None
+        except Exception as e:
+            logger.error(f"Warmup failed: {e}")
+            steps, status, error = {}, "failed", str(e)
+        with self._lock:
+            self.steps = steps
+            self.status = status
+            self.error = error
+            self.finished_at = time.time()
+        logger.info(f"Warmup {status} in {self.finished_at - self.started_at:.2f}s")
+
+    def start(self, executor: Any = None) -> None:
+        # Run warmup on a background thread so the server starts answering /api/ready at once
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self.run, args=(executor,), name="warmup", daemon=True)
+        self._thread.start()
+
+    def mark_ready(self) -> None:
+        # Warmup disabled: report ready immediately
+        with self._lock:
+            self.status = "ready"
+            self.started_at = self.finished_at = time.time()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            seconds = None
+            if self.started_at is not None and self.finished_at is not None:
+                seconds = round(self.finished_at - self.started_at, 4)
+            return {
+                "ready": self.status == "ready",
+                "status": self.status,
+                "seconds": seconds,
+                "steps": self.steps,
+                "error": self.error,
+            }
+
+
+# Process-wide warmup state used by the app lifespan and /api/ready
+warmup_state = WarmupState()
@@ -0,0 +1,81 @@
+# Multi-process serving helpers: per-worker thread limits and preload-before-fork
+# Imports only the standard library and app.config at module level so the thread
+# environment can be set before numpy / OpenCV / torch are first imported
+from __future__ import annotations
+
+import gc
+import logging
+import os
+from pathlib import Path
+from typing import Dict
+
+from app.config import INTRA_OP_THREADS
+
+logger = logging.getLogger(__name__)
+
+# Environment read by the BLAS / OpenMP runtimes when they initialise
+THREAD_ENV_VARS = (
+    "OMP_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+)
+
+
+def threads_per_worker(workers: int) -> int:
+    # INTRA_OP_THREADS if set, else an even share of the CPUs across worker processes
+    if INTRA_OP_THREADS > 0:
+        return INTRA_OP_THREADS
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    return max(1, cpus // max(1, workers))
+
+
+def set_thread_env(threads: int) -> None:
+    # Must run before numpy / torch are imported to take effect; explicit env wins
+    for name in THREAD_ENV_VARS:
+        os.environ.setdefault(name, str(threads))
+
+
+def limit_threads(threads: int) -> Dict[str, int]:
+    # Apply per-process thread limits to the already imported runtimes
+    applied = {}
+    try:
+        import cv2
+
+        cv2.setNumThreads(threads)
+        applied["opencv"] = threads
+    except ImportError:
+        pass
+    try:
+        import torch
+
+        torch.set_num_threads(threads)
+        applied["torch"] = threads
+    except ImportError:
+        pass
+    return applied
+
+
+def preload_shared_state() -> Dict[str, bool]:
+    # Load read-only state in the master before workers fork so it is shared copy-on-write:
+    # OpenCV, torch and the detector model, then freeze the GC so collections in the workers
+    # do not touch (and un-share) the preloaded objects, including the face detector that
+    # every worker process then uses as its process-wide instance
+    from app.models.backends import detector_model_path
+    from app.utils.face_detection import get_face_detector
+
+    # Single-threaded in the master: no OpenMP pool exists at fork time
+    limit_threads(1)
+
+    loaded = {"faceDetector": get_face_detector() is not None, "model": False}
+    model_path = detector_model_path()
+    if model_path and Path(model_path).exists():
+        from app.models.registry import get_detector
+
+        loaded["model"] = get_detector(model_path) is not None
+
+    gc.collect()
+    gc.freeze()
+    logger.info(f"Preloaded shared state before fork: {loaded}")
+    return loaded
@@ -0,0 +1,62 @@
+# Vectorised block-boundary compression artifact scoring
+from __future__ import annotations
+
+import cv2
+import numpy as np
+
+from app.constants import COMPRESSION_BLOCK_SIZE
+
+
+def _gradient_magnitude(gray: np.ndarray) -> np.ndarray:
+    # float32 Sobel gradient magnitude (edge strength)
+    sobelx = cv2.Sobel(gray, cv2.CV_32F, 1, 0, ksize=3)
+    sobely = cv2.Sobel(gray, cv2.CV_32F, 0, 1, ksize=3)
+    return cv2.magnitude(sobelx, sobely)
+
+
+def _boundary_pair_sums(line_sums: np.ndarray, block_size: int) -> np.ndarray:
+    # Sum of the two lines straddling each block boundary, via a strided reshape
+    # line_sums: [N, L] per-row (or per-column) gradient sums
+    # Boundary at b pairs lines b-1 and b for b in range(block_size, L, block_size)
+    n, length = line_sums.shape
+    count = len(range(block_size, length, block_size))
+    if count == 0:
+        return np.zeros((n, 0), dtype=np.float64)
+    tail = line_sums[:, block_size - 1:]
+    padded = np.zeros((n, count * block_size), dtype=np.float64)
+    usable = min(tail.shape[1], padded.shape[1])
+    padded[:, :usable] = tail[:, :usable]
+    return padded.reshape(n, count, block_size)[:, :, :2].sum(axis=-1)
+
+
+def block_artifact_ratios(grays: np.ndarray, block_size: int = COMPRESSION_BLOCK_SIZE) -> np.ndarray:
+    # Boundary-to-interior edge ratio per frame for a stacked batch of grayscale frames
+    # grays: [N, H, W] (or a single [H, W] frame). Returns float [N] in [0, 1];
+    # NaN for frames too small to contain a block boundary
+    batch = grays[None] if grays.ndim == 2 else grays
+    n = batch.shape[0]
+    if n == 0:
+        return np.zeros(0, dtype=np.float64)
+
+    gradient = np.stack([_gradient_magnitude(g) for g in batch])
+
+    # Per-row and per-column edge sums (float64 accumulation over float32 data)
+    row_sums = gradient.sum(axis=2, dtype=np.float64)
+    col_sums = gradient.sum(axis=1, dtype=np.float64)
+
+    horizontal = _boundary_pair_sums(row_sums, block_size)
+    vertical = _boundary_pair_sums(col_sums, block_size)
+    boundary_count = horizontal.shape[1] + vertical.shape[1]
+    if boundary_count == 0:
+        return np.full(n, np.nan)
+
+    # Higher boundary edges = more pronounced block artifacts
+    avg_boundary_edge = (horizontal.sum(axis=1) + vertical.sum(axis=1)) / boundary_count
+    # Average edge everywhere
+    avg_interior_edge = row_sums.sum(axis=1) / (gradient.shape[1] * gradient.shape[2])
+
+    # Ratio of boundary to interior edges - if much higher, indicates blocks
+    ratios = np.zeros(n, dtype=np.float64)
+    positive = avg_interior_edge > 0
+    ratios[positive] = np.minimum(1.0, avg_boundary_edge[positive] / avg_interior_edge[positive])
+    return ratios
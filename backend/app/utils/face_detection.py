@@ -0,0 +1,289 @@
+# Face detection backends: Haar cascade and OpenCV DNN (YuNet), run on downscaled frames
+from __future__ import annotations
+
+import logging
+import math
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+import cv2
+import numpy as np
+
+from app.config import ANALYSIS_WORKERS, FACE_DETECTOR_BACKEND, FACE_DETECTOR_BACKENDS, FACE_DETECTOR_MODEL_PATH
+from app.constants import FACE_DETECTION_MAX_SIDE, FACE_DNN_SCORE_THRESHOLD, FACE_MIN_SIZE
+
+logger = logging.getLogger(__name__)
+
+HAAR_CASCADE_FILE = "haarcascade_frontalface_default.xml"
+
+# One detector pool per process, shared by every analysis thread. The native detect calls
+# keep per-call state on the object, so an instance runs one detect at a time; the pool
+# gives each concurrent caller its own instance (up to ANALYSIS_WORKERS). Its first
+# instance is the one preloaded in a pre-fork master and shared by the workers copy-on-write
+_detector: Optional["FaceDetectorPool"] = None
+_detector_lock = threading.Lock()
+
+# Latency counters shared by all threads, keyed by backend name
+_timings: Dict[str, Dict[str, float]] = {}
+_timings_lock = threading.Lock()
+
+
+def _record_timing(backend: str, frames: int, seconds: float) -> None:
+    with _timings_lock:
+        entry = _timings.setdefault(backend, {"calls": 0, "frames": 0, "totalSeconds": 0.0, "lastSeconds": 0.0})
+        entry["calls"] += 1
+        entry["frames"] += frames
+        entry["totalSeconds"] += seconds
+        entry["lastSeconds"] = seconds
+
+
+def face_detector_stats() -> Dict[str, Dict[str, float]]:
+    # Per-backend detect latency (totals, last call, mean per frame)
+    with _timings_lock:
+        out = {}
+        for backend, entry in _timings.items():
+            frames = entry["frames"] or 1
+            out[backend] = {
+                "calls": entry["calls"],
+                "frames": entry["frames"],
+                "totalSeconds": round(entry["totalSeconds"], 4),
+                "lastSeconds": round(entry["lastSeconds"], 4),
+                "avgMsPerFrame": round(1000.0 * entry["totalSeconds"] / frames, 3),
+            }
+        return out
+
+
+def downscale_for_detection(image: np.ndarray, max_side: int = FACE_DETECTION_MAX_SIDE) -> tuple[np.ndarray, float]:
+    # Shrink image so its longer side is at most max_side, returns (image, scale)
+    h, w = image.shape[:2]
+    longest = max(h, w)
+    if max_side <= 0 or longest <= max_side:
+        return image, 1.0
+    scale = max_side / longest
+    size = (max(1, round(w * scale)), max(1, round(h * scale)))
+    return cv2.resize(image, size, interpolation=cv2.INTER_AREA), scale
+
+
+class FaceDetector:
+    # Interface for face detection backends
+    # detect() takes a BGR frame (and optionally its grayscale view) and returns int
+    # boxes [K, 4] (x, y, w, h) in original-frame coordinates
+
+    name: str = "base"
+    # Smallest face side the backend can find in the downscaled image (e.g. Haar's window)
+    min_window: int = 1
+
+    def __init__(self, max_side: int = FACE_DETECTION_MAX_SIDE):
+        self.max_side = max_side
+        # Held around the native detect call only (callers sharing one instance queue on it;
+        # FaceDetectorPool callers never do)
+        self._lock = threading.Lock()
+
+    def _scale(self, h: int, w: int) -> float:
+        if self.max_side > 0 and max(h, w) > self.max_side:
+            return self.max_side / max(h, w)
+        return 1.0
+
+    def min_face_side(self, frame_shape: tuple) -> int:
+        # Smallest face (original-frame pixels) reported for frames of this shape: FACE_MIN_SIZE,
+        # or larger when the downscale pushes it below the backend's window
+        scale = self._scale(*frame_shape[:2])
+        return max(FACE_MIN_SIZE, math.ceil(self.min_window / scale))
+
+    def _detect_scaled(self, bgr: np.ndarray, gray: Optional[np.ndarray], scale: float) -> np.ndarray:
+        # Detect on the downscaled image; boxes in downscaled coordinates
+        raise NotImplementedError
+
+    def _detect_one(self, bgr: np.ndarray, gray: Optional[np.ndarray]) -> np.ndarray:
+        scale = self._scale(*bgr.shape[:2])
+        faces = self._detect_scaled(bgr, gray, scale)
+        if len(faces) == 0:
+            return np.zeros((0, 4), dtype=np.int32)
+        # Rescale boxes back to the original frame
+        return np.round(np.asarray(faces, dtype=np.float32)[:, :4] / scale).astype(np.int32)
+
+    def detect(self, bgr: np.ndarray, gray: Optional[np.ndarray] = None) -> np.ndarray:
+        start = time.perf_counter()
+        boxes = self._detect_one(bgr, gray)
+        _record_timing(self.name, 1, time.perf_counter() - start)
+        return boxes
+
+    def detect_batch(self, frames: List[np.ndarray]) -> List[np.ndarray]:
+        # Detect on several BGR frames, recorded as one timed batch
+        start = time.perf_counter()
+        boxes = [self._detect_one(f, None) for f in frames]
+        _record_timing(self.name, len(frames), time.perf_counter() - start)
+        return boxes
+
+
+class HaarCascadeFaceDetector(FaceDetector):
+    # OpenCV frontal-face Haar cascade (no model file needed)
+
+    name = "haar"
+
+    def __init__(self, max_side: int = FACE_DETECTION_MAX_SIDE):
+        super().__init__(max_side)
+        cascade_path = cv2.data.haarcascades + HAAR_CASCADE_FILE
+        self.cascade = cv2.CascadeClassifier(cascade_path)
+        if self.cascade.empty():
+            raise FileNotFoundError(f"Could not load Haar cascade from {cascade_path}")
+        # The cascade cannot match faces smaller than its training window (24x24)
+        self.min_window = int(min(self.cascade.getOriginalWindowSize()))
+
+    def _detect_scaled(self, bgr: np.ndarray, gray: Optional[np.ndarray], scale: float) -> np.ndarray:
+        if gray is None:
+            gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
+        small, _ = downscale_for_detection(gray, self.max_side)
+        min_side = max(self.min_window, round(FACE_MIN_SIZE * scale))
+        with self._lock:
+            faces = self.cascade.detectMultiScale(small, scaleFactor=1.1, minNeighbors=5, minSize=(min_side, min_side))
+        return np.asarray(faces).reshape(-1, 4) if len(faces) else np.zeros((0, 4))
+
+
+class YuNetFaceDetector(FaceDetector):
+    # OpenCV DNN face detector (cv2.FaceDetectorYN) loaded from a local .onnx model
+
+    name = "yunet"
+
+    def __init__(self, model_path: str | Path, max_side: int = FACE_DETECTION_MAX_SIDE):
+        super().__init__(max_side)
+        path = Path(model_path)
+        if not path.is_file():
+            raise FileNotFoundError(f"YuNet model not found: {model_path}")
+        if not hasattr(cv2, "FaceDetectorYN"):
+            raise RuntimeError("cv2.FaceDetectorYN requires OpenCV >= 4.5.4")
+        self.detector = cv2.FaceDetectorYN.create(str(path), "", (320, 320), FACE_DNN_SCORE_THRESHOLD)
+        self._input_size: Optional[tuple] = None
+
+    def _detect_scaled(self, bgr: np.ndarray, gray: Optional[np.ndarray], scale: float) -> np.ndarray:
+        small, _ = downscale_for_detection(bgr, self.max_side)
+        size = (small.shape[1], small.shape[0])
+        with self._lock:
+            if size != self._input_size:
+                self.detector.setInputSize(size)
+                self._input_size = size
+            _, faces = self.detector.detect(small)
+        if faces is None:
+            return np.zeros((0, 4))
+        min_side = FACE_MIN_SIZE * scale
+        faces = faces[(faces[:, 2] >= min_side) & (faces[:, 3] >= min_side)]
+        return faces[:, :4]
+
+
+class FaceDetectorPool(FaceDetector):
+    # Detector handle shared by the analysis threads: each detect borrows an idle instance of
+    # the backend, so concurrent analyses detect in parallel instead of queueing on one lock.
+    # Extra instances are created lazily, up to size, only while every instance is busy
+
+    def __init__(self, first: FaceDetector, factory: Callable[[], FaceDetector], size: int = ANALYSIS_WORKERS):
+        super().__init__(first.max_side)
+        self.name = first.name
+        self.min_window = first.min_window
+        self.size = max(1, int(size))
+        self._factory = factory
+        # Last returned first: a lightly loaded process keeps reusing its warm instance
+        self._idle: "queue.LifoQueue[FaceDetector]" = queue.LifoQueue()
+        self._idle.put(first)
+        self._created = 1
+        self._grow_lock = threading.Lock()
+
+    def _grow(self) -> Optional[FaceDetector]:
+        # Another instance, or None once the pool is at size (or the backend fails to load again)
+        with self._grow_lock:
+            if self._created >= self.size:
+                return None
+            self._created += 1
+        try:
+            return self._factory()
+        except Exception as e:
+            logger.warning(f"Could not create another '{self.name}' face detector, sharing the existing ones: {e}")
+            with self._grow_lock:
+                self.size = self._created = self._created - 1
+            return None
+
+    @contextmanager
+    def _borrow(self) -> Iterator[FaceDetector]:
+        try:
+            detector = self._idle.get_nowait()
+        except queue.Empty:
+            detector = self._grow() or self._idle.get()
+        try:
+            yield detector
+        finally:
+            self._idle.put(detector)
+
+    def _detect_one(self, bgr: np.ndarray, gray: Optional[np.ndarray]) -> np.ndarray:
+        with self._borrow() as detector:
+            return detector._detect_one(bgr, gray)
+
+
+def create_face_detector(backend: str, model_path: str = "") -> FaceDetector:
+    # Build a detector for the named backend
+    if backend == "haar":
+        return HaarCascadeFaceDetector()
+    if backend == "yunet":
+        return YuNetFaceDetector(model_path)
+    raise ValueError(
+        f"Unknown face detector backend '{backend}'. Expected one of: {', '.join(FACE_DETECTOR_BACKENDS)}"
+    )
+
+
+def get_face_detector() -> Optional[FaceDetector]:
+    # The process's shared detector pool for FACE_DETECTOR_BACKEND, falling back to the
+    # Haar cascade if the configured backend cannot be loaded; None if nothing loads
+    global _detector
+    if _detector is not None:
+        return _detector
+
+    with _detector_lock:
+        if _detector is not None:
+            return _detector
+        candidates = [FACE_DETECTOR_BACKEND]
+        if FACE_DETECTOR_BACKEND != "haar":
+            candidates.append("haar")
+        for backend in candidates:
+            try:
+                first = create_face_detector(backend, FACE_DETECTOR_MODEL_PATH)
+            except Exception as e:
+                logger.warning(f"Face detector backend '{backend}' unavailable: {e}")
+                continue
+            _detector = FaceDetectorPool(first, lambda: create_face_detector(first.name, FACE_DETECTOR_MODEL_PATH))
+            return _detector
+    return None
+
+
+def benchmark_face_detectors(frames: List[np.ndarray], backends: List[str], model_path: str = "") -> Dict[str, Dict[str, float]]:
+    # Time a batched detect per backend on the same frames, with face counts as a recall proxy
+    results = {}
+    for backend in backends:
+        try:
+            detector = create_face_detector(backend, model_path)
+        except Exception as e:
+            results[backend] = {"error": str(e)}
+            continue
+        start = time.perf_counter()
+        boxes = detector.detect_batch(frames)
+        elapsed = time.perf_counter() - start
+        results[backend] = {
+            "seconds": round(elapsed, 4),
+            "msPerFrame": round(1000.0 * elapsed / max(1, len(frames)), 3),
+            "framesWithFaces": sum(1 for b in boxes if len(b)),
+            "faces": int(sum(len(b) for b in boxes)),
+        }
+    return results
+
+
+if __name__ == "__main__":
+    # Compare backends on a video: python -m app.utils.face_detection video.mp4 [yunet.onnx]
+    import json
+    import sys
+
+    from app.utils.video_utils import extract_frames
+
+    sample_frames, _, _ = extract_frames(sys.argv[1])
+    model = sys.argv[2] if len(sys.argv) > 2 else FACE_DETECTOR_MODEL_PATH
+    print(json.dumps(benchmark_face_detectors(sample_frames, list(FACE_DETECTOR_BACKENDS), model), indent=2))
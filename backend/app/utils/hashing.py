@@ -0,0 +1,43 @@
+# File hashing helpers
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Tuple
+
+_HASH_CHUNK_BYTES = 1024 * 1024
+
+# Most recently used digests kept (one entry per file version; uploads are hashed once each)
+_FILE_HASH_CACHE_SIZE = 256
+
+# (resolved path, mtime_ns, size) -> sha256 hex, least recently used first
+_file_hash_cache: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+_file_hash_lock = threading.Lock()
+
+
+def sha256_file(path: str | Path) -> str:
+    # SHA-256 of a file, memoised by path + mtime + size so unchanged files are hashed once
+    resolved = Path(path).resolve()
+    st = resolved.stat()
+    key = (str(resolved), st.st_mtime_ns, st.st_size)
+    with _file_hash_lock:
+        cached = _file_hash_cache.get(key)
+        if cached is not None:
+            _file_hash_cache.move_to_end(key)
+    if cached is not None:
+        return cached
+
+    hasher = hashlib.sha256()
+    with open(resolved, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_BYTES), b""):
+            hasher.update(chunk)
+    digest = hasher.hexdigest()
+
+    with _file_hash_lock:
+        _file_hash_cache[key] = digest
+        _file_hash_cache.move_to_end(key)
+        while len(_file_hash_cache) > _FILE_HASH_CACHE_SIZE:
+            _file_hash_cache.popitem(last=False)
+    return digest
@@ -69,35 +69,33 @@ def preprocess_frame(
     return normalized
 
 
-def preprocess_frames_batch(
+def frames_to_blob(
     frames: List[np.ndarray],
-    target_height: int = MODEL_INPUT_HEIGHT,
-    target_width: int = MODEL_INPUT_WIDTH,
+    height: int = MODEL_INPUT_HEIGHT,
+    width: int = MODEL_INPUT_WIDTH,
+    mean: Tuple[float, float, float] = IMAGENET_MEAN,
+    std: Tuple[float, float, float] = IMAGENET_STD,
 ) -> np.ndarray:
-    # Preprocess list of frames into a stacked batch array
-    if not frames:
-        return np.array([], dtype=np.float32)
-
-    # Process each frame individually, then stack
-    # This is clearer than complex numpy operations
-    preprocessed_frames = []
-
-    for frame in frames:
-        try:
-            preprocessed = preprocess_frame(frame, target_height, target_width)
-            preprocessed_frames.append(preprocessed)
-        except Exception as e:
-            # Log but don't fail - skip corrupted frames
-            logger.warning(f"Failed to preprocess frame: {e}")
-            continue
-
-    if not preprocessed_frames:
-        return np.array([], dtype=np.float32)
-
-    # Stack frames along batch dimension: shape becomes (N, H, W, 3)
-    batch = np.stack(preprocessed_frames, axis=0)
-
-    return batch.astype(np.float32)
+    # Batched BGR -> normalized RGB float32 blob [N, 3, H, W], C-contiguous
+    # Frames are resized straight into one preallocated uint8 buffer, then each
+    # channel is scaled and shifted in a single float32 pass:
+    # (x / 255 - mean) / std == x * (1 / (255 * std)) - mean / std
+    n = len(frames)
+    pixels = np.empty((n, height, width, 3), dtype=np.uint8)
+    for i, frame in enumerate(frames):
+        if frame.shape[:2] == (height, width):
+            pixels[i] = frame
+        else:
+            cv2.resize(frame, (width, height), dst=pixels[i], interpolation=cv2.INTER_LINEAR)
+
+    blob = np.empty((n, 3, height, width), dtype=np.float32)
+    for c in range(3):
+        # BGR input: RGB channel c lives at index 2 - c
+        scale = np.float32(1.0 / (255.0 * std[c]))
+        shift = np.float32(mean[c] / std[c])
+        np.multiply(pixels[..., 2 - c], scale, out=blob[:, c], dtype=np.float32)
+        blob[:, c] -= shift
+    return blob
 
 
 def frame_to_rgb(frame: np.ndarray) -> np.ndarray:
@@ -0,0 +1,271 @@
+# Streaming upload ingestion: multipart bodies parsed straight to disk with early size abort
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+
+from app.constants import UPLOAD_CHUNK_SIZE_BYTES, UPLOAD_MULTIPART_OVERHEAD_BYTES
+
+try:
+    import python_multipart as multipart
+    from python_multipart.multipart import parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    import multipart
+    from multipart.multipart import parse_options_header
+
+logger = logging.getLogger(__name__)
+
+# Largest accepted non-file form field (e.g. a batch manifest)
+UPLOAD_MAX_FIELD_BYTES = 1024 * 1024
+
+
+class UploadRejected(Exception):
+    # A request (or one file part of it) that cannot be accepted, with its HTTP status
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class RequestBodyTooLarge(Exception):
+    # Raised from the wrapped receive() once a body exceeds its size limit
+    pass
+
+
+@dataclass
+# StoredUpload: one file part of a multipart request, written to disk as it arrived
+class StoredUpload:
+    field: str
+    filename: str
+    path: Optional[Path] = None
+    size: int = 0
+    content_hash: str = ""
+    # Set when the file was rejected; nothing is kept on disk then
+    error: Optional[str] = None
+    status_code: int = 200
+
+    def discard(self) -> None:
+        if self.path is not None:
+            self.path.unlink(missing_ok=True)
+            self.path = None
+
+
+class _FilePart:
+    # Destination file of the part being received, written in UPLOAD_CHUNK_SIZE_BYTES blocks
+
+    def __init__(self, upload: StoredUpload):
+        self.upload = upload
+        self.out = open(upload.path, "wb")
+        self.hasher = hashlib.sha256()
+        self.pending = bytearray()
+
+    async def flush(self) -> None:
+        if self.pending:
+            data, self.pending = bytes(self.pending), bytearray()
+            # Disk write off the event loop
+            await run_in_threadpool(self.out.write, data)
+
+    def close(self) -> None:
+        self.out.close()
+
+
+async def receive_multipart(
+    request: Request,
+    destination: Callable[[str, str], Path],
+    max_file_bytes: int,
+    max_field_bytes: int = UPLOAD_MAX_FIELD_BYTES,
+) -> Tuple[List[StoredUpload], Dict[str, str]]:
+    # Parse a multipart/form-data body from request.stream(), writing every file part
+    # straight to destination(field, filename) while hashing it, so the body is read
+    # once and written once. destination may raise UploadRejected to skip a file.
+    # A file growing past max_file_bytes is deleted at once and reported on its
+    # StoredUpload (status 413); the rest of its data is dropped as it arrives.
+    # Returns (file parts in request order, text fields)
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data":
+        raise UploadRejected(400, "Expected a multipart/form-data upload")
+    boundary = params.get(b"boundary")
+    if not boundary:
+        raise UploadRejected(400, "Missing multipart boundary")
+
+    # Parser callbacks are synchronous: collect events, then handle them with awaits
+    events: List[Tuple[str, Any]] = []
+    header_field = bytearray()
+    header_value = bytearray()
+    headers: Dict[bytes, bytes] = {}
+
+    def on_header_end() -> None:
+        headers[bytes(header_field).lower()] = bytes(header_value)
+        header_field.clear()
+        header_value.clear()
+
+    def on_headers_finished() -> None:
+        events.append(("headers", dict(headers)))
+        headers.clear()
+
+    parser = multipart.MultipartParser(boundary, {
+        "on_part_data": lambda data, start, end: events.append(("data", data[start:end])),
+        "on_part_end": lambda: events.append(("end", None)),
+        "on_header_field": lambda data, start, end: header_field.extend(data[start:end]),
+        "on_header_value": lambda data, start, end: header_value.extend(data[start:end]),
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+    })
+
+    uploads: List[StoredUpload] = []
+    fields: Dict[str, str] = {}
+    part: Optional[_FilePart] = None
+    upload: Optional[StoredUpload] = None
+    field_name: Optional[str] = None
+    field_value = bytearray()
+
+    async def handle(kind: str, payload: Any) -> None:
+        nonlocal part, upload, field_name, field_value
+        if kind == "headers":
+            _, options = parse_options_header(payload.get(b"content-disposition", b""))
+            name = options.get(b"name", b"").decode("utf-8", "replace")
+            if b"filename" not in options:
+                field_name, field_value = name, bytearray()
+                return
+            upload = StoredUpload(name, options[b"filename"].decode("utf-8", "replace"))
+            uploads.append(upload)
+            try:
+                upload.path = destination(name, upload.filename)
+                part = _FilePart(upload)
+            except UploadRejected as e:
+                upload.path, upload.error, upload.status_code = None, e.detail, e.status_code
+        elif kind == "data":
+            if field_name is not None:
+                field_value.extend(payload)
+                if len(field_value) > max_field_bytes:
+                    raise UploadRejected(413, f"Form field '{field_name}' too large")
+            elif part is not None:
+                upload.size += len(payload)
+                if upload.size > max_file_bytes:
+                    part.close()
+                    part = None
+                    upload.discard()
+                    upload.error = f"Video file too large. Maximum: {max_file_bytes / 1024 / 1024:.0f}MB"
+                    upload.status_code = 413
+                    return
+                part.hasher.update(payload)
+                part.pending.extend(payload)
+                if len(part.pending) >= UPLOAD_CHUNK_SIZE_BYTES:
+                    await part.flush()
+        elif kind == "end":
+            if field_name is not None:
+                fields[field_name] = field_value.decode("utf-8", "replace")
+                field_name = None
+            elif part is not None:
+                await part.flush()
+                part.close()
+                upload.content_hash = part.hasher.hexdigest()
+                part = None
+            upload = None
+
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            for kind, payload in events:
+                await handle(kind, payload)
+            events.clear()
+        parser.finalize()
+        for kind, payload in events:
+            await handle(kind, payload)
+        if part is not None:
+            raise UploadRejected(400, "Incomplete multipart upload")
+    except BaseException:
+        # Never leave partial files behind
+        if part is not None:
+            part.close()
+        for stored in uploads:
+            stored.discard()
+        raise
+
+    for stored in uploads:
+        logger.debug(f"Stored upload {stored.filename}: {stored.size} bytes, sha256={stored.content_hash}")
+    return uploads, fields
+
+
+class UploadSizeLimitMiddleware:
+    # ASGI middleware bounding request bodies: rejects from Content-Length before any of
+    # the body is read, and counts the bytes actually received so chunked bodies are
+    # cut off as soon as they cross the limit. Register it inside CORSMiddleware so the
+    # 413 responses carry CORS headers.
+    # path_limits overrides max_bytes for exact paths (e.g. multi-file batch uploads)
+
+    def __init__(self, app, max_bytes: int, path_prefix: str = "/api", path_limits: Optional[Dict[str, int]] = None):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.path_prefix = path_prefix
+        self.path_limits = path_limits or {}
+
+    async def _reject(self, send, size: str, max_bytes: int) -> None:
+        body = json.dumps({
+            "detail": f"Video file too large ({size}). Maximum: {max_bytes / 1024 / 1024:.0f}MB"
+        }).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope.get("path", "").startswith(self.path_prefix):
+            await self.app(scope, receive, send)
+            return
+
+        max_bytes = self.path_limits.get(scope["path"], self.max_bytes)
+        max_body_bytes = max_bytes + UPLOAD_MULTIPART_OVERHEAD_BYTES
+
+        content_length = None
+        for name, value in scope.get("headers", []):
+            if name == b"content-length":
+                try:
+                    content_length = int(value)
+                except ValueError:
+                    content_length = None
+                break
+
+        if content_length is not None and content_length > max_body_bytes:
+            logger.warning(f"Rejected upload early: content-length={content_length}")
+            await self._reject(send, f"{content_length / 1024 / 1024:.1f}MB", max_bytes)
+            return
+
+        received = 0
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_body_bytes:
+                    raise RequestBodyTooLarge()
+            return message
+
+        async def tracked_send(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracked_send)
+        except RequestBodyTooLarge:
+            logger.warning(f"Rejected upload mid-stream after {received} bytes")
+            if response_started:
+                raise
+            await self._reject(send, f">{max_bytes / 1024 / 1024:.0f}MB", max_bytes)
@@ -3,25 +3,145 @@ from __future__ import annotations
 
 import logging
 from pathlib import Path
-from typing import List, Tuple
+from typing import Any, Collection, Dict, Iterator, List, Optional, Tuple
 
 import cv2
 import numpy as np
 
-from app.constants import DEFAULT_MAX_FRAMES, DEFAULT_FRAMES_PER_SECOND
+from app.config import FRAME_SAMPLING_MODES
+from app.constants import (
+    DEFAULT_MAX_FRAMES,
+    DEFAULT_FRAMES_PER_SECOND,
+    DEFAULT_FRAME_SAMPLING_MODE,
+    INTRA_ONLY_FOURCCS,
+    SEEK_MIN_FRAME_GAP,
+)
 from app.exceptions import VideoProcessingError, NoFramesExtractedError
 
 logger = logging.getLogger(__name__)
 
 
-def extract_frames(
+def _fourcc_to_str(code: int) -> str:
+    # Decode CAP_PROP_FOURCC integer into its 4-character codec tag
+    return "".join(chr((code >> (8 * i)) & 0xFF) for i in range(4))
+
+
+def choose_sampling_mode(fourcc: int, total_frames: int, interval: int) -> str:
+    # Pick the cheaper decode strategy from container metadata
+    # Seeking needs a reliable frame count; without it we can only walk the stream
+    if total_frames <= 0:
+        return "grab"
+    # Every frame is a keyframe: a seek decodes exactly one frame
+    if _fourcc_to_str(fourcc) in INTRA_ONLY_FOURCCS:
+        return "seek"
+    # Inter-coded streams: a seek re-decodes from the previous keyframe, so it only
+    # pays off when kept frames are further apart than a typical GOP
+    return "seek" if interval >= SEEK_MIN_FRAME_GAP else "grab"
+
+
+def plan_sample_indices(
+    total_frames: int,
+    fps: float,
+    frames_per_second: float,
+    max_frames: int,
+) -> List[int]:
+    # Plan which frame indices to decode so samples cover the whole clip
+    # Short clips keep the regular frames_per_second cadence; when that would exceed
+    # max_frames, max_frames positions are spread evenly across the full duration
+    # instead of truncating after the first max_frames samples
+    if total_frames <= 0 or max_frames <= 0:
+        return []
+
+    interval = max(1, int(fps / max(frames_per_second, 0.1)))
+    regular_count = (total_frames + interval - 1) // interval
+    if regular_count <= max_frames:
+        return list(range(0, total_frames, interval))
+
+    # Midpoints of max_frames equal segments (avoids the often-unreadable last frame)
+    step = total_frames / max_frames
+    return [int((i + 0.5) * step) for i in range(max_frames)]
+
+
+def spread_subset(indices: List[int], count: int) -> List[int]:
+    # Pick count positions spread evenly over indices (first and last included)
+    if count <= 0 or len(indices) <= count:
+        return list(indices)
+    if count == 1:
+        return [indices[len(indices) // 2]]
+    picks = sorted({round(i * (len(indices) - 1) / (count - 1)) for i in range(count)})
+    return [indices[p] for p in picks]
+
+
+def _read_by_grab(cap: cv2.VideoCapture, indices: List[int]) -> Iterator[np.ndarray]:
+    # Walk the stream with grab() and only retrieve() (decode + colour convert) kept frames
+    targets = iter(indices)
+    target = next(targets, None)
+    frame_idx = 0
+    while target is not None:
+        if not cap.grab():
+            # End of video or decode error
+            break
+        if frame_idx == target:
+            ret, frame = cap.retrieve()
+            if not ret:
+                break
+            yield frame
+            target = next(targets, None)
+        frame_idx += 1
+
+
+def _read_by_seek(cap: cv2.VideoCapture, indices: List[int]) -> Iterator[np.ndarray]:
+    # Jump straight to each kept frame via CAP_PROP_POS_FRAMES
+    for idx in indices:
+        if not cap.set(cv2.CAP_PROP_POS_FRAMES, idx):
+            break
+        ret, frame = cap.read()
+        if not ret:
+            break
+        yield frame
+
+
+def _read_sequential(cap: cv2.VideoCapture, interval: int, positions: List[int]) -> Iterator[np.ndarray]:
+    # Frame count unknown: grab every frame, retrieve the interval-th frames at the given
+    # sample positions (ascending; the n-th kept frame is position n)
+    targets = iter(positions)
+    target = next(targets, None)
+    kept = 0
+    frame_idx = 0
+    while target is not None and cap.grab():
+        if frame_idx % interval == 0:
+            if kept == target:
+                ret, frame = cap.retrieve()
+                if not ret:
+                    break
+                yield frame
+                target = next(targets, None)
+            kept += 1
+        frame_idx += 1
+
+
+def iter_frames(
     video_path: str | Path,
     frames_per_second: float = DEFAULT_FRAMES_PER_SECOND,
     max_frames: int = DEFAULT_MAX_FRAMES,
-) -> Tuple[List[np.ndarray], float, int]:
-    # Extract sampled frames from a video file
+    sampling_mode: str = DEFAULT_FRAME_SAMPLING_MODE,
+    metadata: Optional[Dict[str, Any]] = None,
+    probe_frames: int = 0,
+    skip_positions: Collection[int] = (),
+) -> Iterator[np.ndarray]:
+    # Stream sampled frames from a video file one at a time
+    # Decode cost scales with the number of kept frames, not the length of the video.
+    # If metadata is given it is filled with fps/total_frames/sampling_mode/planned_frames once
+    # opened, and positions: the sample positions (0 .. planned_frames - 1) this call yields.
+    # probe_frames > 0 yields only that many positions, spread evenly over the plan;
+    # skip_positions leaves positions out (e.g. the frames a probe already decoded)
     video_path_str = str(video_path)
 
+    if sampling_mode not in FRAME_SAMPLING_MODES:
+        raise VideoProcessingError(
+            f"Invalid sampling mode '{sampling_mode}'. Expected one of: {', '.join(FRAME_SAMPLING_MODES)}"
+        )
+
     # Use cv2.VideoCapture to open the video file
     # We try to open the file before any other operations to fail fast
     cap = cv2.VideoCapture(video_path_str)
@@ -35,44 +155,71 @@ def extract_frames(
         # These are used to calculate frame sampling interval
         fps = cap.get(cv2.CAP_PROP_FPS) or 25.0  # Default 25 FPS if unavailable
         total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        fourcc = int(cap.get(cv2.CAP_PROP_FOURCC) or 0)
 
         # Calculate sampling interval to achieve desired frames_per_second
         # For example: if fps=30 and frames_per_second=1, interval=30 (skip 30 frames)
         interval = max(1, int(fps / max(frames_per_second, 0.1)))
 
-        frames: List[np.ndarray] = []
-        frame_idx = 0
-
-        # Read frames in a loop until we hit max_frames or end of video
-        while len(frames) < max_frames:
-            ret, frame = cap.read()
-
-            # ret=False means we've reached end of video or hit an error
-            if not ret:
-                break
-
-            # Sample frames at regular intervals to reduce computation
-            # This preserves temporal diversity while reducing data volume
-            if frame_idx % interval == 0:
-                frames.append(frame)
-
-            frame_idx += 1
-
-        if not frames:
+        # Plan target positions across the whole clip from container metadata
+        indices = plan_sample_indices(total_frames, fps, frames_per_second, max_frames)
+        planned = len(indices) if indices else max(0, max_frames)
+        positions = list(range(planned))
+        if probe_frames > 0:
+            positions = spread_subset(positions, probe_frames)
+        if skip_positions:
+            positions = [p for p in positions if p not in skip_positions]
+        targets = [indices[p] for p in positions] if indices else []
+        gap = indices[1] - indices[0] if len(indices) > 1 else interval
+
+        mode = sampling_mode
+        if mode == "auto" and probe_frames > 0 and indices:
+            # A probe's few targets span the whole clip: grab() would walk every frame up
+            # to the last one, a seek decodes at most one GOP per target
+            mode = "seek"
+        elif mode == "auto":
+            mode = choose_sampling_mode(fourcc, total_frames, gap)
+        elif mode == "seek" and total_frames <= 0:
+            # Cannot plan seek targets without a frame count
+            mode = "grab"
+
+        if metadata is not None:
+            metadata.update({
+                "fps": float(fps),
+                "total_frames": total_frames,
+                "sampling_mode": mode,
+                # Frames of the full plan (exact unless decoding fails early)
+                "planned_frames": planned,
+                "positions": positions,
+            })
+
+        if indices:
+            reader = _read_by_seek(cap, targets) if mode == "seek" else _read_by_grab(cap, targets)
+        else:
+            # Frame count unknown: regular cadence from the start, capped at max_frames
+            reader = _read_sequential(cap, interval, positions)
+
+        count = 0
+        for frame in reader:
+            count += 1
+            yield frame
+
+        if count == 0 and positions:
             msg = f"No frames could be extracted from video: {video_path}. File may be corrupted."
             logger.error(msg)
             raise NoFramesExtractedError(msg)
 
         logger.info(
-            f"Extracted {len(frames)} frames at {frames_per_second} fps from video "
-            f"(original fps: {fps}, total frames: {total_frames})"
+            f"Extracted {count} frames at {frames_per_second} fps from video "
+            f"(original fps: {fps}, total frames: {total_frames}, sampling: {mode})"
         )
 
-        return frames, float(fps), total_frames
-
     except (VideoProcessingError, NoFramesExtractedError):
         # Re-raise our custom exceptions as-is
         raise
+    except GeneratorExit:
+        # Consumer stopped early (e.g. a stage failed); nothing to report
+        raise
     except Exception as e:
         # Catch any unexpected errors (e.g., memory issues, codec problems)
         msg = f"Unexpected error extracting frames: {str(e)}"
@@ -84,6 +231,19 @@ def extract_frames(
         cap.release()
 
 
+def extract_frames(
+    video_path: str | Path,
+    frames_per_second: float = DEFAULT_FRAMES_PER_SECOND,
+    max_frames: int = DEFAULT_MAX_FRAMES,
+    sampling_mode: str = DEFAULT_FRAME_SAMPLING_MODE,
+) -> Tuple[List[np.ndarray], float, int]:
+    # Extract sampled frames from a video file into a list
+    # Prefer iter_frames for analysis; this materialises every frame at once
+    metadata: Dict[str, Any] = {}
+    frames = list(iter_frames(video_path, frames_per_second, max_frames, sampling_mode, metadata))
+    return frames, metadata["fps"], metadata["total_frames"]
+
+
 def get_video_metadata(video_path: str | Path) -> dict:
     # Extract metadata from a video file without loading frames
     video_path_str = str(video_path)
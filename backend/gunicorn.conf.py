@@ -0,0 +1,30 @@
+# Preload-and-fork serving: gunicorn -c gunicorn.conf.py app.main:app
+# The master imports the app and loads the detector once, then forks WEB_WORKERS uvicorn
+# workers that share those pages copy-on-write
+from app.config import HOST, PORT, WEB_WORKERS
+from app.serving import limit_threads, set_thread_env, threads_per_worker
+
+_threads = threads_per_worker(WEB_WORKERS)
+
+# Before the app (and with it numpy / OpenCV / torch) is imported by preload_app
+set_thread_env(_threads)
+
+bind = f"{HOST}:{PORT}"
+workers = max(1, WEB_WORKERS)
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+# Analysis of long clips can exceed the default 30s worker heartbeat
+timeout = 300
+graceful_timeout = 30
+
+
+def when_ready(server):
+    # Runs in the master after the app is imported, before the workers fork
+    from app.serving import preload_shared_state
+
+    preload_shared_state()
+
+
+def post_fork(server, worker):
+    applied = limit_threads(_threads)
+    worker.log.info(f"Worker {worker.pid} thread limits: {applied}")
@@ -0,0 +1,14 @@
+# Shared pytest setup: import the backend from this checkout and keep uploads, jobs and
+# caches out of the working tree (config reads the environment at import time)
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+os.environ.setdefault("UPLOAD_DIR", tempfile.mkdtemp(prefix="deepguard-tests-"))
+os.environ.setdefault("RESULT_CACHE_DIR", "")
+os.environ.setdefault("WARMUP_ON_STARTUP", "false")
+os.environ["JOB_MAX_ATTEMPTS"] = "2"
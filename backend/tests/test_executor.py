@@ -0,0 +1,52 @@
+# Analysis executor: a crashed process-pool worker fails only its own task
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from app.services.executor import AnalysisExecutor
+
+
+@pytest.fixture
+def process_executor():
+    executor = AnalysisExecutor(max_workers=1, pool_type="process")
+    yield executor
+    executor.shutdown()
+
+
+def test_pool_is_rebuilt_after_worker_crash(process_executor):
+    first_pid = process_executor.submit(os.getpid).result(timeout=60)
+
+    crashed = process_executor.submit(os._exit, 1)
+    with pytest.raises(BrokenProcessPool):
+        crashed.result(timeout=60)
+
+    # The next request gets a fresh worker instead of failing forever
+    second_pid = process_executor.submit(os.getpid).result(timeout=60)
+    assert second_pid != first_pid
+    stats = process_executor.stats()
+    assert stats["poolRestarts"] == 1
+    assert (stats["completed"], stats["failed"], stats["active"]) == (2, 1, 0)
+
+
+def test_submit_to_broken_pool_is_retried(process_executor):
+    process_executor.submit(os.getpid).result(timeout=60)
+    pool = process_executor._get_pool()
+    # Break the pool behind the executor's back, before any done callback can replace it
+    pool._broken = "worker died"
+    assert process_executor.submit(os.getpid).result(timeout=60) > 0
+    assert process_executor._get_pool() is not pool
+    assert process_executor.stats()["poolRestarts"] == 1
+
+
+def report_pid(reports):
+    reports.put(os.getpid())
+
+
+def test_start_workers_waits_for_every_worker():
+    executor = AnalysisExecutor(max_workers=3, pool_type="process", initializer=report_pid)
+    try:
+        pids = executor.start_workers(timeout=60)
+        assert len(set(pids)) == 3
+    finally:
+        executor.shutdown()
@@ -0,0 +1,70 @@
+# Face detector pool: parallel detects on separate instances, bounded and lazily grown
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from app.utils.face_detection import FaceDetector, FaceDetectorPool
+
+
+class SlowDetector(FaceDetector):
+    # Records how many callers are inside each instance at once
+    name = "slow"
+
+    def __init__(self):
+        super().__init__(max_side=0)
+        self.active = 0
+        self.max_active = 0
+        self._count_lock = threading.Lock()
+
+    def _detect_scaled(self, bgr, gray, scale):
+        with self._count_lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.02)
+        with self._count_lock:
+            self.active -= 1
+        return np.array([[1, 2, 3, 4]])
+
+
+def _pool(size):
+    created = []
+
+    def factory():
+        created.append(SlowDetector())
+        return created[-1]
+
+    return FaceDetectorPool(factory(), factory, size), created
+
+
+def test_sequential_use_keeps_one_instance():
+    pool, created = _pool(4)
+    frame = np.zeros((8, 8, 3), dtype=np.uint8)
+    for _ in range(5):
+        assert pool.detect(frame).tolist() == [[1, 2, 3, 4]]
+    assert len(created) == 1
+
+
+def test_concurrent_detects_use_separate_instances():
+    pool, created = _pool(3)
+    frame = np.zeros((8, 8, 3), dtype=np.uint8)
+    with ThreadPoolExecutor(6) as executor:
+        results = list(executor.map(lambda _: pool.detect(frame), range(30)))
+    assert all(r.tolist() == [[1, 2, 3, 4]] for r in results)
+    assert 1 < len(created) <= 3
+    assert all(detector.max_active == 1 for detector in created)
+
+
+def test_failed_extra_instance_falls_back_to_sharing():
+    first = SlowDetector()
+
+    def broken_factory():
+        raise RuntimeError("no more detectors")
+
+    pool = FaceDetectorPool(first, broken_factory, 4)
+    frame = np.zeros((8, 8, 3), dtype=np.uint8)
+    with ThreadPoolExecutor(3) as executor:
+        results = list(executor.map(lambda _: pool.detect(frame), range(6)))
+    assert len(results) == 6 and first.max_active == 1
+    assert pool.size == 1
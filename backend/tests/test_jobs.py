@@ -0,0 +1,144 @@
+# Job queue recovery: jobs of dead server processes and of dead analysis workers
+import os
+import sqlite3
+import subprocess
+import sys
+import time
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from app.services import jobs
+from app.services.executor import AnalysisExecutor
+
+
+def crash_worker(*args):
+    # Stands in for run_job: the analysis worker process dies mid-job
+    os._exit(1)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return jobs.JobStore(tmp_path / "jobs.sqlite3")
+
+
+def _claimed_job(store, job_id="job1"):
+    store.create(job_id, "v.mp4", "/nonexistent/v.mp4", "hash")
+    return store.claim_next()
+
+
+def _set_owner(store, job_id, pid):
+    with sqlite3.connect(store.db_path) as conn:
+        conn.execute("UPDATE jobs SET owner_pid = ? WHERE id = ?", (pid, job_id))
+
+
+def _dead_pid():
+    child = subprocess.Popen([sys.executable, "-c", "pass"])
+    child.wait()
+    return child.pid
+
+
+def _wait_for(predicate, timeout=60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+needs_boot_id = pytest.mark.skipif(not jobs.OWNER_HOST, reason="no boot id to compare pids against")
+
+
+@needs_boot_id
+def test_job_of_dead_process_is_requeued(store):
+    job = _claimed_job(store)
+    assert job.owner_pid == os.getpid() and job.owner_token == jobs.OWNER_TOKEN
+    _set_owner(store, job.id, _dead_pid())
+
+    assert store.requeue_stale() == 1
+    requeued = store.get(job.id)
+    assert requeued.status == "queued"
+    assert requeued.owner_pid is None and requeued.owner_token is None
+
+
+@needs_boot_id
+def test_job_of_dead_process_fails_after_max_attempts(store):
+    job = _claimed_job(store)
+    _set_owner(store, job.id, _dead_pid())
+    assert store.requeue_stale(max_attempts=1) == 0
+    assert store.get(job.id).status == "failed"
+
+
+def test_job_of_live_owner_is_kept(store):
+    job = _claimed_job(store)
+    assert store.requeue_stale(stale_seconds=0) == 0
+    assert store.requeue_stale(running_here={job.id}) == 0
+    assert store.get(job.id).status == "running"
+
+
+def test_claim_no_longer_running_here_is_recovered(store):
+    # The owner is alive, but the job is no longer on its executor
+    job = _claimed_job(store)
+    assert store.requeue_stale(running_here=set()) == 1
+    assert store.get(job.id).status == "queued"
+
+
+def test_release_only_applies_to_the_current_attempt(store):
+    job = _claimed_job(store)
+    assert store.release(job.id, job.attempts + 1) is None
+    assert store.release(job.id, job.attempts) == "queued"
+    assert store.release(job.id, job.attempts) is None
+
+
+def test_cancelled_attempt_does_not_count(store):
+    job = _claimed_job(store)
+    runner = jobs.JobRunner(store)
+    future = Future()
+    future.cancel()
+    runner._on_done(job, future)
+    requeued = store.get(job.id)
+    assert (requeued.status, requeued.attempts) == ("queued", 0)
+
+
+def test_broken_pool_future_requeues_then_fails(store):
+    runner = jobs.JobRunner(store)
+    for expected in ("queued", "failed"):
+        job = store.claim_next() or _claimed_job(store)
+        future = Future()
+        future.set_exception(BrokenProcessPool("worker died"))
+        runner._on_done(job, future)
+        assert store.get(job.id).status == expected
+
+
+def test_killed_pool_worker_does_not_strand_the_job(store, monkeypatch):
+    monkeypatch.setattr(jobs, "run_job", crash_worker)
+    executor = AnalysisExecutor(max_workers=1, pool_type="process")
+    runner = jobs.JobRunner(store, poll_interval=0.05)
+    store.create("job1", "v.mp4", "/nonexistent/v.mp4", "hash")
+    runner.start(executor)
+    try:
+        # Each attempt's worker dies: requeued once, then failed (JOB_MAX_ATTEMPTS = 2)
+        assert _wait_for(lambda: store.get("job1").status == "failed")
+    finally:
+        runner.stop()
+        executor.shutdown()
+    job = store.get("job1")
+    assert job.attempts == 2
+    assert job.error == "Analysis was interrupted too many times"
+    assert executor.stats()["poolRestarts"] >= 1
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+def test_forked_process_gets_its_own_owner_token():
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.write(write_end, jobs.OWNER_TOKEN.encode())
+        os._exit(0)
+    os.close(write_end)
+    os.waitpid(pid, 0)
+    child_token = os.read(read_end, 64).decode()
+    os.close(read_end)
+    assert child_token and child_token != jobs.OWNER_TOKEN
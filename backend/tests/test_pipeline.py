@@ -0,0 +1,34 @@
+# Frame pipeline: dropped views skip the stages after the one that dropped them
+import numpy as np
+
+from app.services.pipeline import FramePipeline, FrameStage
+
+
+class Recorder(FrameStage):
+    def __init__(self, sees_dropped=False):
+        self.sees_dropped = sees_dropped
+        self.seen = []
+        self.closed = False
+
+    def update(self, view):
+        self.seen.append(int(view.bgr[0, 0, 0]))
+
+    def close(self):
+        self.closed = True
+
+
+class DropOdd(FrameStage):
+    def update(self, view):
+        view.dropped = bool(view.bgr[0, 0, 0] % 2)
+
+
+def test_dropped_frames_only_reach_stages_that_see_them():
+    before, after, counter = Recorder(), Recorder(), Recorder(sees_dropped=True)
+    pipeline = FramePipeline([before, DropOdd(), after, counter])
+    frames = (np.full((4, 4, 3), i, dtype=np.uint8) for i in range(6))
+
+    assert pipeline.run(frames) == 6
+    assert before.seen == [0, 1, 2, 3, 4, 5]
+    assert after.seen == [0, 2, 4]
+    assert counter.seen == [0, 1, 2, 3, 4, 5]
+    assert before.closed and after.closed and counter.closed
@@ -0,0 +1,114 @@
+# Result cache: hits and misses per tier, fingerprint invalidation, model-fallback results
+import importlib
+
+import pytest
+
+from app import constants
+from app.services.video_analysis import AnalysisResult
+from app.utils import hashing
+
+result_cache_module = importlib.import_module("app.services.result_cache")
+
+
+def _result(method: str = "ensemble") -> AnalysisResult:
+    return AnalysisResult(
+        is_ai_generated=True,
+        confidence=0.8,
+        detection_method=method,
+        frame_count=10,
+        risk_level="high",
+        processing_time_seconds=3.0,
+        details={"sharpness": 0.4},
+    )
+
+
+@pytest.fixture
+def no_model(monkeypatch):
+    monkeypatch.setattr(result_cache_module, "detector_model_path", lambda: "")
+
+
+def test_memory_hit_and_miss(no_model):
+    cache = result_cache_module.ResultCache(max_entries=4)
+    assert cache.get("abc") is None
+    cache.put("abc", _result())
+    served = cache.get("abc")
+    assert served is not None and served.confidence == 0.8
+    # Served time is the lookup's, not the original analysis'
+    assert served.processing_time_seconds < 3.0
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def test_memory_tier_evicts_least_recently_used(no_model):
+    cache = result_cache_module.ResultCache(max_entries=2)
+    cache.put("a", _result())
+    cache.put("b", _result())
+    cache.get("a")
+    cache.put("c", _result())
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+
+def test_disk_tier_survives_a_new_instance(no_model, tmp_path):
+    result_cache_module.ResultCache(max_entries=2, disk_dir=tmp_path).put("abc", _result())
+    fresh = result_cache_module.ResultCache(max_entries=2, disk_dir=tmp_path)
+    assert fresh.get("abc") is not None
+    assert fresh.stats()["diskHits"] == 1
+
+
+def test_constant_change_invalidates(no_model, monkeypatch, tmp_path):
+    cache = result_cache_module.ResultCache(max_entries=4, disk_dir=tmp_path)
+    cache.put("abc", _result())
+    monkeypatch.setattr(constants, "FACE_MIN_SIZE", constants.FACE_MIN_SIZE + 1)
+    assert cache.get("abc") is None
+    monkeypatch.undo()
+    monkeypatch.setattr(result_cache_module, "detector_model_path", lambda: "")
+    assert cache.get("abc") is not None
+
+
+def test_weights_change_invalidates(monkeypatch, tmp_path):
+    weights = tmp_path / "w.pth"
+    weights.write_bytes(b"v1")
+    monkeypatch.setattr(result_cache_module, "detector_model_path", lambda: str(weights))
+    cache = result_cache_module.ResultCache(max_entries=4)
+    cache.put("abc", _result())
+    assert cache.get("abc") is not None
+    weights.write_bytes(b"version 2")
+    assert cache.get("abc") is None
+
+
+def test_heuristic_fallback_not_cached_when_model_configured(monkeypatch, tmp_path):
+    weights = tmp_path / "w.pth"
+    weights.write_bytes(b"weights")
+    monkeypatch.setattr(result_cache_module, "detector_model_path", lambda: str(weights))
+    cache = result_cache_module.ResultCache(max_entries=4, disk_dir=tmp_path / "cache")
+    cache.put("fallback", _result("heuristic"))
+    cache.put("scored", _result("ensemble"))
+    cache.put("faceless", _result("no_human"))
+    assert cache.get("fallback") is None
+    assert cache.get("scored") is not None
+    assert cache.get("faceless") is not None
+    assert cache.stats()["skipped"] == 1
+
+
+def test_heuristic_result_cached_without_model(no_model):
+    cache = result_cache_module.ResultCache(max_entries=4)
+    cache.put("abc", _result("heuristic"))
+    assert cache.get("abc") is not None
+
+
+def test_file_hash_cache_is_bounded(monkeypatch, tmp_path):
+    monkeypatch.setattr(hashing, "_FILE_HASH_CACHE_SIZE", 2)
+    monkeypatch.setattr(hashing, "_file_hash_cache", type(hashing._file_hash_cache)())
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"f{i}"
+        path.write_bytes(bytes([i]) * 10)
+        paths.append(path)
+        hashing.sha256_file(path)
+    assert len(hashing._file_hash_cache) == 2
+    assert str(paths[0].resolve()) not in {key[0] for key in hashing._file_hash_cache}
+
+    before = hashing.sha256_file(paths[2])
+    paths[2].write_bytes(b"changed contents")
+    assert hashing.sha256_file(paths[2]) != before
@@ -0,0 +1,123 @@
+# Human probe and frame stages on small synthetic clips, with a stand-in face detector
+import cv2
+import numpy as np
+import pytest
+
+from app.constants import FACE_PROBE_FRAMES
+from app.services import video_analysis
+from app.utils.face_detection import FaceDetector
+
+CLIP_FRAMES = 60
+# Background pixel away from the face square; its grey level encodes the frame index
+MARKER = (100, 140)
+
+
+class SquareDetector(FaceDetector):
+    # "Faces" are the white squares drawn into the test clips
+    name = "square"
+
+    def __init__(self):
+        super().__init__(max_side=0)
+        self.calls = 0
+
+    def _detect_scaled(self, bgr, gray, scale):
+        self.calls += 1
+        if gray is None:
+            gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
+        ys, xs = np.nonzero(gray > 240)
+        if not len(xs):
+            return np.zeros((0, 4))
+        return np.array([[xs.min(), ys.min(), xs.max() - xs.min() + 1, ys.max() - ys.min() + 1]])
+
+
+def write_clip(path, face_frames=()):
+    # Intra-only MJPG clip; frames in face_frames get a 32x32 white square with a dark centre
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 25, (160, 120))
+    for i in range(CLIP_FRAMES):
+        frame = np.full((120, 160, 3), 40 + 3 * i, dtype=np.uint8)
+        if i in face_frames:
+            frame[10:42, 10:42] = 255
+            frame[20:32, 20:32] = 0
+        writer.write(frame)
+    writer.release()
+    return str(path)
+
+
+def frame_index(bgr):
+    return int(round((float(bgr[MARKER].mean()) - 40) / 3))
+
+
+@pytest.fixture
+def analysis(monkeypatch, tmp_path):
+    # Samples every frame of a clip; records decoded, analysed and model-scored frame
+    # indices (the model stage only records, so its score stays -1 and the heuristic wins)
+    detector = SquareDetector()
+    decoded, analysed, modelled = [], [], []
+    weights = tmp_path / "weights.pth"
+    weights.touch()
+    monkeypatch.setattr(video_analysis, "get_face_detector", lambda: detector)
+    monkeypatch.setattr(video_analysis, "detector_model_path", lambda: str(weights))
+    monkeypatch.setattr(video_analysis, "FRAMES_PER_SECOND_SAMPLED", 25.0)
+    monkeypatch.setattr(video_analysis, "MAX_FRAMES", CLIP_FRAMES)
+    monkeypatch.setattr(video_analysis, "FRAME_SAMPLING_MODE", "auto")
+    monkeypatch.setattr(video_analysis, "ANALYSIS_REGION", "frame")
+
+    real_iter_frames = video_analysis.util_iter_frames
+
+    def counting_iter_frames(*args, **kwargs):
+        for frame in real_iter_frames(*args, **kwargs):
+            decoded.append(frame_index(frame))
+            yield frame
+
+    real_update = video_analysis.HeuristicStage.update
+
+    def recording_update(self, view):
+        analysed.append(frame_index(view.bgr))
+        real_update(self, view)
+
+    def recording_model_update(self, view):
+        modelled.append(frame_index(view.bgr))
+
+    monkeypatch.setattr(video_analysis, "util_iter_frames", counting_iter_frames)
+    monkeypatch.setattr(video_analysis.HeuristicStage, "update", recording_update)
+    monkeypatch.setattr(video_analysis.ModelInferenceStage, "update", recording_model_update)
+    return detector, decoded, analysed, modelled
+
+
+def test_faceless_clip_is_rejected_after_the_probe(tmp_path, analysis):
+    detector, decoded, analysed, modelled = analysis
+    result = video_analysis.analyze_video(write_clip(tmp_path / "faceless.avi"))
+
+    assert result.detection_method == "no_human"
+    assert result.frame_count == FACE_PROBE_FRAMES
+    assert len(decoded) == FACE_PROBE_FRAMES
+    assert decoded == sorted(decoded) and decoded[0] == 0 and decoded[-1] == CLIP_FRAMES - 1
+    assert detector.calls == FACE_PROBE_FRAMES
+    # No analysis stage, heuristic or model, runs on a rejected clip
+    assert analysed == [] and modelled == []
+
+
+def test_probed_frames_are_replayed_in_order(tmp_path, analysis):
+    _, decoded, analysed, modelled = analysis
+    # Only the last third has a face, so the probe decodes most of its frames first
+    result = video_analysis.analyze_video(write_clip(tmp_path / "late.avi", range(40, CLIP_FRAMES)))
+
+    assert result.detection_method == "heuristic"
+    assert result.frame_count == CLIP_FRAMES
+    # Every frame decoded exactly once, analysed in clip order
+    assert sorted(decoded) == list(range(CLIP_FRAMES))
+    assert analysed == list(range(CLIP_FRAMES))
+    assert modelled == list(range(CLIP_FRAMES))
+
+
+def test_face_mode_analyses_only_frames_with_a_face(tmp_path, analysis, monkeypatch):
+    _, decoded, analysed, modelled = analysis
+    monkeypatch.setattr(video_analysis, "ANALYSIS_REGION", "face")
+    face_frames = range(20, 40)
+    result = video_analysis.analyze_video(write_clip(tmp_path / "middle.avi", face_frames))
+
+    assert result.frame_count == CLIP_FRAMES
+    assert analysed == list(face_frames)
+    assert modelled == list(face_frames)
+    assert result.details["face_frames"] == len(face_frames)
+    assert result.details["face_skipped_frames"] == CLIP_FRAMES - len(face_frames)
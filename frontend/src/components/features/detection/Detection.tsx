@@ -7,12 +7,35 @@ import { useApp } from '../../../context/AppContext';
 import { useVideoUpload } from '../../../hooks/useVideoUpload';
 import { useAnalysis } from '../../../hooks/useAnalysis';
 import { useVideoCompression } from '../../../hooks/useVideoCompression';
-import type { VideoDetails } from '../../../types';
+import type { AnalysisProgress, VideoDetails } from '../../../types';
+
+// Short status line for the analyze button while an analysis streams progress
+const describeProgress = (progress: AnalysisProgress | null): string => {
+  if (!progress) return 'Analyzing...';
+  const score =
+    progress.partialScore !== undefined ? ` · running score ${(progress.partialScore * 100).toFixed(0)}%` : '';
+  switch (progress.stage) {
+    case 'queued':
+      return 'Queued...';
+    case 'human_check':
+      return 'Checking for people...';
+    case 'frames':
+      return `Analyzing frame ${progress.framesDecoded ?? 0}/${progress.framesPlanned ?? '?'}${score}`;
+    case 'model_batch':
+      return `Model batch ${progress.batch}/${progress.batches}${score}`;
+    case 'scoring':
+    case 'feature':
+    case 'done':
+      return 'Scoring...';
+    default:
+      return 'Analyzing...';
+  }
+};
 
 // Detection component for video analysis workflow
 const Detection: React.FC = () => {
   const { video, selectVideo, clearVideo } = useVideoUpload();
-  const { analyzeVideo, isLoading } = useAnalysis();
+  const { analyzeVideo, isLoading, progress } = useAnalysis();
   const { addToast, currentVideo, setCurrentVideo } = useApp();
   const { compressVideo, progress: compressionProgress, isAvailable: isCompressionAvailable } = useVideoCompression();
   const [analysisResult, setAnalysisResult] = React.useState(currentVideo?.result || null);
@@ -439,7 +462,7 @@ const Detection: React.FC = () => {
                       <div className="animate-spin" style={{ width: '20px', height: '20px' }}>
                         ⚙️
                       </div>
-                      Analyzing...
+                      {describeProgress(progress)}
                     </>
                   ) : (
                     <>
@@ -14,6 +14,12 @@ export const API_BASE_URL =
 // Endpoint for video analysis
 export const getAnalyzeUrl = () => `${API_BASE_URL}/api/analyze`;
 
+// Endpoint for queueing a background analysis job
+export const getJobsUrl = () => `${API_BASE_URL}/api/jobs`;
+
+// Server-sent progress events of an analysis job
+export const getJobEventsUrl = (jobId: string) => `${API_BASE_URL}/api/jobs/${jobId}/events`;
+
 
 // VIDEO UPLOAD CONFIGURATION
 
@@ -1,20 +1,53 @@
 // Hook for managing video analysis workflow
-// Handles validation, API calls, errors, and result state
+// Handles validation, API calls, live progress, errors, and result state
 import { useCallback, useState } from 'react';
-import { getAnalyzeUrl } from '../config';
-import type { DetectionResult, VideoDetails } from '../types';
+import { getJobEventsUrl, getJobsUrl } from '../config';
+import type { AnalysisProgress, DetectionResult, VideoDetails } from '../types';
 import { useApp } from '../context/AppContext';
 
 interface UseAnalysisReturn {
   analyzeVideo: (videoDetails: VideoDetails) => Promise<DetectionResult | null>;
   isLoading: boolean;
   error: string | null;
+  // Latest progress of the running analysis (null when idle)
+  progress: AnalysisProgress | null;
 }
 
+// Follow a job's server-sent events until its result (or error) arrives
+// EventSource reconnects by itself and resumes after the last event it saw
+const streamJobResult = (
+  jobId: string,
+  onProgress: (update: AnalysisProgress) => void
+): Promise<DetectionResult> =>
+  new Promise((resolve, reject) => {
+    const source = new EventSource(getJobEventsUrl(jobId));
+
+    source.addEventListener('progress', (event) => {
+      onProgress(JSON.parse((event as MessageEvent).data));
+    });
+
+    source.addEventListener('result', (event) => {
+      source.close();
+      resolve(JSON.parse((event as MessageEvent).data));
+    });
+
+    source.addEventListener('error', (event) => {
+      // Server-sent "error" events carry a detail; connection errors carry no data
+      const data = event instanceof MessageEvent ? event.data : undefined;
+      if (data) {
+        source.close();
+        reject(new Error(JSON.parse(data).detail || 'Analysis failed'));
+      } else if (source.readyState === EventSource.CLOSED) {
+        reject(new Error('Lost connection to the analysis server'));
+      }
+    });
+  });
+
 // Hook to handle video analysis and expose analyzeVideo
 export const useAnalysis = (): UseAnalysisReturn => {
   const [isLoading, setIsLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
+  const [progress, setProgress] = useState<AnalysisProgress | null>(null);
   const { addToast } = useApp();
 
   // Main analysis function
@@ -23,6 +56,7 @@ export const useAnalysis = (): UseAnalysisReturn => {
       // Reset state before analysis
       setIsLoading(true);
       setError(null);
+      setProgress({ stage: 'queued' });
 
       try {
         // Validate file exists
@@ -38,9 +72,9 @@ export const useAnalysis = (): UseAnalysisReturn => {
         // Show loading toast
         addToast('Analyzing video... This may take a few seconds', 'info', 0);
 
-        // Call API endpoint
+        // Queue the analysis job
         // Use fetch with proper error handling
-        const response = await fetch(getAnalyzeUrl(), {
+        const response = await fetch(getJobsUrl(), {
           method: 'POST',
           body: formData,
           // Don't set Content-Type - browser auto-detects for FormData
@@ -53,8 +87,12 @@ export const useAnalysis = (): UseAnalysisReturn => {
           throw new Error(errorMessage);
         }
 
-        // Parse response
-        const result: DetectionResult = await response.json();
+        // Stream progress until the result arrives
+        // Updates are merged so totals (framesPlanned, batches) persist across stages
+        const { jobId } = await response.json();
+        const result = await streamJobResult(jobId, (update) =>
+          setProgress((previous) => ({ ...previous, ...update }))
+        );
 
         // Validate response has required fields
         if (!('isAIGenerated' in result) || !('confidence' in result)) {
@@ -85,6 +123,7 @@ export const useAnalysis = (): UseAnalysisReturn => {
         return null;
       } finally {
         setIsLoading(false);
+        setProgress(null);
       }
     },
     [addToast]
@@ -94,6 +133,7 @@ export const useAnalysis = (): UseAnalysisReturn => {
     analyzeVideo,
     isLoading,
     error,
+    progress,
   };
 };
 
@@ -45,6 +45,29 @@ export interface DetectionResult {
   error?: string;
 }
 
+// Progress of an in-flight analysis, streamed by the backend as server-sent events
+// Fields present depend on the stage
+export interface AnalysisProgress {
+  // Current stage: "queued", "human_check", "frames", "model_batch", "scoring", "feature" or "done"
+  stage: string;
+
+  // Frames decoded so far and the number planned for this video
+  framesDecoded?: number;
+  framesPlanned?: number;
+
+  // Running heuristic score over the frames decoded so far [0.0-1.0]
+  partialScore?: number;
+
+  // Model micro-batch k of n and the running model score [0.0-1.0]
+  batch?: number;
+  batches?: number;
+  partialModelScore?: number;
+
+  // Heuristic feature just scored (e.g. "sharpness_score") and its score
+  feature?: string;
+  score?: number;
+}
+
 // Video file details before and after analysis
 // Tracks lifecycle: selection, preview, analysis, results
 export interface VideoDetails {
@@ -1,5 +1,11 @@
 #!/usr/bin/env bash
 # Run DeepGuard AI backend from project root.
 # Usage: ./run_backend.sh [port]
+# With WEB_WORKERS > 1, serves through gunicorn: models are preloaded once and the
+# workers are forked from that process (see backend/gunicorn.conf.py)
 PORT=${1:-8000}
-cd "$(dirname "$0")/backend" && python -m uvicorn app.main:app --host 0.0.0.0 --port "$PORT"
+cd "$(dirname "$0")/backend" || exit 1
+if [ "${WEB_WORKERS:-1}" -gt 1 ]; then
+  PORT="$PORT" exec python -m gunicorn -c gunicorn.conf.py app.main:app
+fi
+exec python -m uvicorn app.main:app --host 0.0.0.0 --port "$PORT"